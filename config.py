@@ -13,6 +13,9 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
 
+# Serve paraphrased conversational prompts from the embedding-similarity cache
+USE_SEMANTIC_CACHE = os.getenv("USE_SEMANTIC_CACHE", "false").lower() == "true"
+
 # Handle Google TTS credentials for Hugging Face Spaces
 def setup_google_credentials():
     """Setup Google credentials for TTS service"""
@@ -1,12 +1,32 @@
 # In: core/logger_config.py
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
+# Drains queued records to the real handler on a background thread
+_queue_listener = None
+
+def _stop_queue_listener():
+    """Flushes and stops the active listener (at most once)."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+atexit.register(_stop_queue_listener)
+
 def setup_logger():
     """
     Set up the root logger with a timestamped format and 
     DEBUG level, replacing any existing handlers.
+
+    Records are handed to a QueueHandler and written to stdout by a
+    QueueListener thread, so logging from async handlers never blocks the
+    event loop on the stdout lock.
     """
+    global _queue_listener
     # Get the root logger
     logger = logging.getLogger()
     
@@ -24,8 +44,14 @@ def setup_logger():
     # Set the formatter for the handler
     handler.setFormatter(formatter)
     
-    # Add the new handler to the root logger
-    logger.addHandler(handler)
+    # Route records through a queue; only the listener thread touches stdout
+    _stop_queue_listener()
+    log_queue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _queue_listener.start()
+
+    # Add the queue handler to the root logger
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Set the logging level
     logger.setLevel(logging.INFO) # Change to logging.DEBUG for more verbose output
@@ -6,12 +6,13 @@ from fastrtc import Stream
 # --- Import services and models ---
 # from services.stt_service import AssemblyAITranscriber
 # from services.azure_speech_service import AzureSpeechService
-from services.llm_service import GeminiChat
+from services.llm_service import get_gemini_chat
 from services.tts_service import GoogleTTS
 from services.streaming_speech_service import StreamingAudioService    
 from data.ielts_questions import IELTSQuestionBank
 # from logic.ielts_models import IELTSState
 from logic.audio_processing import AuroraStreamHandler
+from logic.session_manager import session_manager
 from logic.streaming_handlers import start_recording_handler, stop_recording_handler
 from logic.ielts_handlers import (
     start_ielts_test_handler, start_ielts_answer_handler, stop_ielts_answer_handler,
@@ -23,9 +24,18 @@ from logic.ielts_handlers import (
 # azure_speech_service = AzureSpeechService()
 streaming_speech_service = StreamingAudioService()
 # stt_service = AssemblyAITranscriber()
-llm_service = GeminiChat()
+llm_service = get_gemini_chat()
 tts_service = GoogleTTS()
 question_bank = IELTSQuestionBank()
+
+# Free the LLM's per-conversation state (ChatSession, semantic cache) with the session.
+# Chat mode keys it by session hash; webrtc_id covers any other id the session used.
+def release_llm_session(session_hash, session_state):
+    llm_service.end_chat_session(session_hash)
+    if session_state.streaming.webrtc_id and session_state.streaming.webrtc_id != session_hash:
+        llm_service.end_chat_session(session_state.streaming.webrtc_id)
+
+session_manager.add_removal_listener(release_llm_session)
 # Initialize the single, global handler
 stream_handler = AuroraStreamHandler()
 audio_stream = Stream(handler=stream_handler, modality="audio", mode="send-receive")
@@ -61,8 +71,8 @@ def create_gradio_interface():
             def start_recording_wrapper(request: gr.Request):
                 return start_recording_handler(request, llm_service, tts_service, streaming_speech_service)
 
-            def stop_recording_wrapper(request: gr.Request):
-                return stop_recording_handler(request, llm_service, tts_service, streaming_speech_service)
+            async def stop_recording_wrapper(request: gr.Request):
+                return await stop_recording_handler(request, llm_service, tts_service, streaming_speech_service)
             # Wire up event handlers
             start_button.click(
                 fn=start_recording_wrapper,  
@@ -133,19 +143,21 @@ def create_gradio_interface():
             def start_ielts_answer_wrapper(request: gr.Request):
                 return start_ielts_answer_handler(request, streaming_speech_service)
 
-            def stop_ielts_answer_wrapper(request: gr.Request):
-                return stop_ielts_answer_handler(request, streaming_speech_service)
+            async def stop_ielts_answer_wrapper(request: gr.Request):
+                return await stop_ielts_answer_handler(request, streaming_speech_service)
 
             def continue_to_next_part_wrapper(request: gr.Request):
                 return continue_to_next_part_handler(request)
 
-            def generate_feedback_wrapper(request: gr.Request):
-                # This needs to be a generator to handle the `yield`
-                yield from generate_feedback_handler(request, llm_service)
+            async def generate_feedback_wrapper(request: gr.Request):
+                # This needs to be an async generator to handle the `yield`
+                async for update in generate_feedback_handler(request, llm_service):
+                    yield update
 
-            def generate_final_report_wrapper(request: gr.Request):
-                # This is also a generator
-                yield from generate_final_report_handler(request, llm_service)
+            async def generate_final_report_wrapper(request: gr.Request):
+                # This is also an async generator
+                async for update in generate_final_report_handler(request, llm_service):
+                    yield update
             
             def reset_test_wrapper(request: gr.Request):
                 return reset_test_handler(request)
@@ -186,4 +198,16 @@ def create_gradio_interface():
                 outputs=[feedback_display, generate_final_report_button]
             )
 
+        # --- Session Teardown ---
+        # Runs when the browser tab closes or disconnects
+        def end_session_wrapper(request: gr.Request):
+            session_state = session_manager.get_session(request.session_hash)
+            if session_state and session_state.streaming.is_recording:
+                # Tab closed mid-answer: stop the consumer and release the Azure recognizer
+                session_state.streaming.is_recording = False
+                session_state.cleanup_streaming_resources()
+            session_manager.remove_session(request.session_hash)
+
+        interface.unload(end_session_wrapper)
+
     return interface
\ No newline at end of file
@@ -9,7 +9,9 @@ from logic.session_manager import session_manager
 # Add to audio_processing.py before queuing
 def has_speech(audio_data, threshold=0.01):
     """Check if audio frame contains speech (energy above threshold)"""
-    return np.max(np.abs(audio_data)) > threshold
+    # Peak |x| from two vectorized reductions: no abs() temporary the size of the
+    # frame. float() avoids int16 overflow when negating -32768.
+    return max(float(audio_data.max()), -float(audio_data.min())) > threshold
 
 class AuroraStreamHandler(StreamHandler):
     """
@@ -32,27 +34,15 @@ class AuroraStreamHandler(StreamHandler):
             session_state = session_manager.get_session(session_hash)
             
             if session_state:
-                # 2. Check queue pressure first
-                try:
-                    queue_size = session_state.streaming.audio_queue.qsize()
-
-                    if queue_size > 45:  # Critical pressure(assumed by chatbot)
-                        logging.error(f"Queue overflow ({queue_size}) - dropping frame")
-                        return
-                
-                except Exception as e:
-                    logging.error(f"Error checking queue size: {e}")
-                    return
-                
-                # 3. Flatten audio
+                # 2. Flatten audio
                 audio_data = audio_arr.flatten()
 
-                # 4. Check for speech before resampling
+                # 3. Check for speech before resampling
                 if not has_speech(audio_data):
                     logging.debug("Silence detected - skipping frame")
                     return
 
-                # 5. Resample to 16kHz if needed
+                # 4. Resample to 16kHz if needed
                 if sr != 16000:
                     # Proper resampling instead of broken integer division
                     target_length = int(len(audio_data) * 16000 / sr)
@@ -60,32 +50,25 @@ class AuroraStreamHandler(StreamHandler):
                     if target_length > 0:
                         # Using scipy.signal.resample for faster, better quality instead of np.interp
                         audio_data = signal.resample(audio_data, target_length)
-                        logging.debug(f"Resampled from {sr}Hz to 16kHz: {len(audio_arr.flatten())} → {len(audio_data)} samples")
+                        logging.debug("Resampled from %sHz to 16kHz: %s → %s samples", sr, audio_arr.size, target_length)
                     else:
-                        logging.warning(f"Invalid resampling: {sr}Hz → 16kHz resulted in 0 samples")
+                        logging.warning("Invalid resampling: %sHz → 16kHz resulted in 0 samples", sr)
                         return
                     
-                # 6. Enqueue processed audio
+                # 5. Enqueue processed audio; a full queue is the only drop signal
+                streaming = session_state.streaming
                 try:
-                    # Ensure audio_data is numpy array before calling tolist()
-                    audio_list = np.asarray(audio_data).tolist()
-                    session_state.streaming.audio_queue.put_nowait(audio_list)
-                    self.chunk_counter += 1
-                    
-                    # Log every 10th chunk with queue size
-                    if self.chunk_counter % 10 == 0:
-                        logging.debug(f"METRICS: audio_chunks_received={self.chunk_counter} queue_size={queue_size + 1} (context: audio_processing)")
-                    
-                    # logging.debug(f"Queued {len(audio_data)} samples from {sr}Hz (queue: {session_state.streaming.audio_queue.qsize()})")
-
-                    if queue_size > 30 and queue_size % 5 == 0:
-                        logging.warning(f"Audio queue high pressure: {queue_size} items")
-
-                    logging.debug(f"Queued {len(audio_data)} samples (queue: {queue_size + 1})")
-
+                    # The queue carries PCM16 LE bytes, the wire format Azure consumes
+                    if not streaming.enqueue_pcm(audio_data):
+                        return
                 except Exception as e:
-                    logging.error(f"DROPPED AUDIO: {e}")  # Queue full, drop frame
-                
+                    logging.error("DROPPED AUDIO: %s", e)
+                    return
+
+                self.chunk_counter += 1
+                # Log every 10th chunk with queue size
+                if self.chunk_counter % 10 == 0:
+                    logging.debug("METRICS: audio_chunks_received=%d queue_size=%d (context: audio_processing)", self.chunk_counter, len(streaming.audio_queue))
                
     def emit(self):
         return None
@@ -24,7 +24,7 @@ def format_history_for_gradio(chat_history: List[ChatTurn]) -> List[tuple[str, s
     return messages
 
 # --- Main streaming-only chat function ---
-def chat_function(
+async def chat_function(
     session_state: StreamingSessionState,
     pronunciation_report: AzurePronunciationReport | None,
     user_transcript: str | None,
@@ -111,7 +111,7 @@ def chat_function(
                 feedback_point=actionable_point
             )
             # Make ONE special API call for the integrated response
-            final_ai_response = llm_service.get_response(full_prompt=prompt, chat_history=None)
+            final_ai_response = await llm_service.get_response(full_prompt=prompt, chat_history=None)
             user_turn.feedback_tip = final_ai_response # Store the generated tip
 
     # --- 4. IF NO FEEDBACK WAS GENERATED, GET A NORMAL RESPONSE ---
@@ -124,19 +124,21 @@ def chat_function(
             for i, turn in enumerate(session_state.chat_history)
         ]
         
-        # Combine the persona prompt with the user's transcript
-        full_prompt_for_conversation = f"{persona_prompt}\n\nUser: {user_transcript}"
-        
-        # Make the standard API call
-        final_ai_response = llm_service.get_response(
+        # Make the standard API call. The persona goes in as the system instruction,
+        # so only the user's words are added to the conversation history.
+        final_ai_response = await llm_service.get_response(
             # The history should not include the latest user message
             chat_history=text_history_for_llm[:-1], 
-            full_prompt=full_prompt_for_conversation
+            full_prompt=user_transcript,
+            system_instruction=persona_prompt,
+            # Reuse this session's chat and scope semantic-cache matches to it
+            session_id=session_state.streaming.webrtc_id,
+            semantic_key=user_transcript
         )
     
     # --- 5. Synthesize Audio for AI's Response ---
     cleaned_text = clean_text_for_speech(final_ai_response)
-    # ai_audio_path = tts_service.synthesize_speech(cleaned_text)
+    # ai_audio_path = await tts_service.synthesize_speech(cleaned_text)
     ai_audio_path = None
 
 
@@ -105,7 +105,7 @@ def start_ielts_answer_handler(request: gr.Request, streaming_service):
         )
 
 
-def stop_ielts_answer_handler(request: gr.Request, streaming_service):
+async def stop_ielts_answer_handler(request: gr.Request, streaming_service):
     """
     Handles the 'Stop Answer' button click for the IELTS mode.
     Stops the stream, gets the final report, and calls the core IELTS logic.
@@ -127,7 +127,7 @@ def stop_ielts_answer_handler(request: gr.Request, streaming_service):
         )
 
     # --- 1. Finalize the audio stream and get the report ---
-    success, final_transcript, report = streaming_service.stop_recording(session_state)
+    success, final_transcript, report = await streaming_service.stop_recording(session_state)
 
     if not success or not report:
         error_message = final_transcript or "Failed to process audio."
@@ -203,7 +203,7 @@ def continue_to_next_part_handler(request: gr.Request):
         gr.update(visible=is_test_over)      # Show final report button if test is over
     )
 
-def generate_feedback_handler(request: gr.Request, llm_service):
+async def generate_feedback_handler(request: gr.Request, llm_service):
     session_state = session_manager.get_session(request.session_hash)
 
     if not session_state or not session_state.ielts_test_state: 
@@ -217,20 +217,20 @@ def generate_feedback_handler(request: gr.Request, llm_service):
         gr.update(interactive=False, visible=True)  # Disable continue button
     )
 
-    # This is a generator, so we yield from it
-    for (updated_state, feedback_display, get_part_feedback_button, continue_to_next_part_button) in \
+    # This is an async generator, so we iterate it with `async for`
+    async for (updated_state, feedback_display, get_part_feedback_button, continue_to_next_part_button) in \
         generate_feedback(session_state.ielts_test_state, llm_service):
         session_state.ielts_test_state = updated_state
         yield feedback_display, get_part_feedback_button, continue_to_next_part_button
 
-def generate_final_report_handler(request: gr.Request, llm_service):
+async def generate_final_report_handler(request: gr.Request, llm_service):
     session_state = session_manager.get_session(request.session_hash)
 
     if not session_state or not session_state.ielts_test_state: 
         yield gr.update(value="Error: Session not found.", visible=True), gr.update(interactive=False)
         return
 
-    for (updated_state, feedback_display, generate_final_report_button) in \
+    async for (updated_state, feedback_display, generate_final_report_button) in \
         generate_final_report(session_state.ielts_test_state, llm_service):
         session_state.ielts_test_state = updated_state
         yield feedback_display, generate_final_report_button
@@ -161,7 +161,7 @@ def reset_test():
     )
 
 # --- Generate Feedback Functionality ---
-def generate_feedback(current_state: IELTSState, llm_service):
+async def generate_feedback(current_state: IELTSState, llm_service):
     """
     Orchestrates the process of getting, parsing, and displaying IELTS feedback.
     """
@@ -209,7 +209,7 @@ def generate_feedback(current_state: IELTSState, llm_service):
     prompt = create_structured_part_feedback_prompt(part_number, questions_and_answers)
 
     # 4. Call the LLM service to get structured feedback
-    feedback_result = llm_service.get_structured_feedback(prompt)
+    feedback_result = await llm_service.get_structured_feedback(prompt)
 
     # --- Process the result ---
     if isinstance(feedback_result, IELTSFeedback):
@@ -251,7 +251,7 @@ def calculate_overall_band_score(scores: list[float]) -> float:
     # Round to the nearest 0.5
     return round(average * 2) / 2
 
-def generate_final_report(current_state: IELTSState, llm_service):
+async def generate_final_report(current_state: IELTSState, llm_service):
     """
     Orchestrates the generation of the final, comprehensive IELTS report.
     """
@@ -309,7 +309,7 @@ def generate_final_report(current_state: IELTSState, llm_service):
     )
 
     # 4. Call the LLM service.
-    final_report_result = llm_service.get_final_report(prompt)
+    final_report_result = await llm_service.get_final_report(prompt)
 
     # Reset the phase, as the process is complete.
     current_state.session_phase = SessionPhase.TEST_COMPLETED
@@ -3,7 +3,7 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 from enum import Enum, auto
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from .audio_models import AzurePronunciationReport
 
 # Define a SessionPhase Enum
@@ -15,20 +15,25 @@ class SessionPhase(Enum):
     TEST_COMPLETED = auto()     # The entire test is over
 
 # --- Pydantic Models for Structured LLM Feedback ---
+# Frozen: utils.ielts_utils memoizes the rendered Markdown per report object,
+# so a feedback report must not change after it has been parsed.
 class FeedbackCriterion(BaseModel):
     """A model to hold the detailed feedback for a single criterion (e.g., Fluency)."""
+    model_config = ConfigDict(frozen=True)
     name: str = Field(..., description="The name of the criterion, e.g., 'Fluency and Coherence'")
     strength: str = Field(..., description="The specific strength identified by the LLM.")
     improvement_area: str = Field(..., description="The specific area for improvement.")
 
 class OverallSummary(BaseModel):
     """A model for the overall summary section of the feedback."""
+    model_config = ConfigDict(frozen=True)
     part_assessed: str = Field(..., description="The part of the test being assessed, e.g., 'Part 1'")
     positive_highlight: str = Field(..., description="A key area where the user performed well.")
     key_improvement_area: str = Field(..., description="The single most important area for the user to improve.")
 
 class DetailedFeedback(BaseModel):
     """A model that contains the detailed breakdown for all four criteria."""
+    model_config = ConfigDict(frozen=True)
     fluency_and_coherence: FeedbackCriterion
     lexical_resource: FeedbackCriterion
     grammatical_range_and_accuracy: FeedbackCriterion
@@ -39,6 +44,7 @@ class IELTSFeedback(BaseModel):
     The main, top-level model for the entire feedback report.
     Our application will try to parse the LLM's JSON response into this model.
     """
+    model_config = ConfigDict(frozen=True)
     overall_summary: OverallSummary = Field(..., description="The overall summary of the feedback.")
     detailed_feedback: DetailedFeedback = Field(..., description="The detailed feedback for each criterion.")
 
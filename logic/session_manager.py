@@ -2,7 +2,7 @@
 import threading
 import time
 import logging
-from typing import Dict, List
+from typing import Callable, Dict, List
 from .session_models import StreamingSessionState
 
 class SessionManager:
@@ -10,6 +10,21 @@ class SessionManager:
     def __init__(self):
         self._sessions: Dict[str, StreamingSessionState] = {}
         self._lock = threading.Lock()
+        # Called with (session_hash, state) after a session is removed, so services
+        # holding per-session resources (e.g. LLM chat sessions) can release them
+        self._removal_listeners: List[Callable[[str, StreamingSessionState], None]] = []
+
+    def add_removal_listener(self, listener: Callable[[str, StreamingSessionState], None]):
+        self._removal_listeners.append(listener)
+
+    def _notify_removed(self, removed: Dict[str, StreamingSessionState]):
+        # Runs outside the lock: listeners may be slow or call back into the manager
+        for session_hash, state in removed.items():
+            for listener in self._removal_listeners:
+                try:
+                    listener(session_hash, state)
+                except Exception as e:
+                    logging.error(f"Session removal listener failed for {session_hash}: {e}")
 
     def get_or_create_session(self, session_hash: str) -> StreamingSessionState:
         with self._lock:
@@ -50,12 +65,15 @@ class SessionManager:
 
     def remove_session(self, session_hash: str):
         with self._lock:
-            if session_hash in self._sessions:
-                del self._sessions[session_hash]
+            state = self._sessions.pop(session_hash, None)
+            if state is not None:
                 logging.info(f"METRICS: active_sessions={len(self._sessions)} (context: session removed)")
+        if state is not None:
+            self._notify_removed({session_hash: state})
 
     def cleanup_old_sessions(self, max_age_seconds: int = 3600):
         """Remove sessions older than max_age_seconds"""
+        removed: Dict[str, StreamingSessionState] = {}
         with self._lock:
             current_time = time.time()
             to_remove = []
@@ -68,10 +86,11 @@ class SessionManager:
                 # Ensure resources are cleaned up before removing
                 if self._sessions[session_hash]:
                      self._sessions[session_hash].cleanup_streaming_resources()
-                del self._sessions[session_hash]
+                removed[session_hash] = self._sessions.pop(session_hash)
             
             if to_remove:
                 logging.info(f"METRICS: active_sessions={len(self._sessions)} (context: {len(to_remove)} old sessions cleaned up)")
+        self._notify_removed(removed)
 
 # Create the single, global instance
 session_manager = SessionManager()
\ No newline at end of file
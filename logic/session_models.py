@@ -3,13 +3,51 @@
 import time  # For session timing calculations
 import logging
 from dataclasses import dataclass, field
-from typing import List, Optional
+from collections import deque
+from typing import Deque, List, Optional
 import asyncio
+import numpy as np
 import azure.cognitiveservices.speech as speechsdk # type: ignore
 from .chat_models import ChatTurn
 from .ielts_models import IELTSState
 import threading
 
+# Frames beyond this many waiting chunks are dropped rather than queued
+AUDIO_QUEUE_MAXSIZE = 50
+DROPPED_FRAMES_LOG_EVERY = 100  # StreamingState.enqueue_pcm logs one line per this many dropped frames
+
+# --- Audio Frame Pool ---
+AUDIO_FRAME_BYTES = 640  # 20 ms of 16 kHz PCM16, the usual WebRTC frame after resampling
+
+class _PooledFrame(bytearray):
+    """Marks a frame buffer as allocated by an AudioBufferPool, so only those are taken back."""
+    __slots__ = ()
+
+class AudioBufferPool:
+    """
+    Freelist of bytearray frame buffers. The producer acquires one per frame and
+    fills it in place; the consumer releases it once the frame has been joined
+    into a batch. Frames of any other size fall back to a normal allocation and
+    are not pooled, and release() ignores buffers the pool did not create, so
+    caller-supplied bytearrays are never reused. deque append/popleft are
+    atomic, so no lock is needed.
+    """
+    def __init__(self, frame_bytes: int = AUDIO_FRAME_BYTES, max_buffers: int = 64):
+        self._free: Deque[bytearray] = deque(maxlen=max_buffers)
+        self._size = frame_bytes
+
+    def acquire(self, nbytes: int) -> bytearray:
+        if nbytes != self._size:
+            return bytearray(nbytes)
+        try:
+            return self._free.popleft()
+        except IndexError:
+            return _PooledFrame(nbytes)
+
+    def release(self, buf: bytearray):
+        if type(buf) is _PooledFrame and len(buf) == self._size:
+            self._free.append(buf)
+
 # --- StreamingState Dataclass ---
 @dataclass
 class StreamingState:
@@ -20,15 +58,20 @@ class StreamingState:
     # Azure SDK components that need careful lifecycle management
     recognizer: Optional[speechsdk.SpeechRecognizer] = None
     push_stream: Optional[speechsdk.audio.PushAudioInputStream] = None
+    session_stopped: threading.Event = field(default_factory=threading.Event)  # Set by the recognizer's session_stopped/canceled
 
-    # Audio processing
-    audio_queue: asyncio.Queue = field(default_factory=asyncio.Queue)
-    audio_buffer: List[float] = field(default_factory=list)
+    # Audio processing: single-producer/single-consumer handoff between the
+    # WebRTC thread and the consumer thread (deque append/popleft are atomic)
+    audio_queue: Deque[bytes] = field(default_factory=deque)  # PCM16 LE chunks
+    audio_ready: threading.Event = field(default_factory=threading.Event)
+    audio_buffer: bytearray = field(default_factory=bytearray)  # Sub-chunk residual held back until the next batch or flush
+    frame_pool: AudioBufferPool = field(default_factory=AudioBufferPool)  # Reused buffers for the queued frames
         
     # State flags and data buffers
     webrtc_id: Optional[str] = None
     is_recording: bool = False
     session_transcript_fragments: List[dict] = field(default_factory=list)
+    fragments_lock: threading.Lock = field(default_factory=threading.Lock)  # Guards fragments across SDK/worker threads
     current_utterance_buffer: str = ""  # Buffer for in-progress speech
     final_pronunciation_json: Optional[dict] = None
     pronunciation_reports_cache: List[dict] = field(default_factory=list)  # For multi-utterance sessions
@@ -36,23 +79,72 @@ class StreamingState:
 
     # Session management
     is_active: bool = True
-    recording_start_time: Optional[float] = None
+    recording_start_time: Optional[float] = None  # time.monotonic() reading; only used for durations
     max_recording_seconds: int = 600  # 10 minutes
     retry_count: int = 0
     max_retries: int = 3
     last_error: Optional[str] = None
     audio_chunks_processed: int = 0  # Track processing load
+    dropped_frames: int = 0  # Frames refused by put_audio because the queue was full
+    write_latency_ema: float = 0.025  # Smoothed push_stream.write duration (s); drives batch size
 
     # Consumer task management
     consumer_task: Optional[asyncio.Task] = None
     
+    def put_audio(self, chunk: bytes) -> bool:
+        """
+        Producer side: enqueue one PCM16 LE chunk and wake the consumer.
+        Returns False, without queuing, when AUDIO_QUEUE_MAXSIZE chunks are already
+        waiting; the drop is counted in dropped_frames.
+        """
+        if len(self.audio_queue) >= AUDIO_QUEUE_MAXSIZE:
+            self.dropped_frames += 1
+            return False
+        self.audio_queue.append(chunk)
+        self.audio_ready.set()
+        return True
+
+    def enqueue_pcm(self, audio_data) -> bool:
+        """
+        Producer side: queue one frame of 16 kHz mono audio, given either as PCM16 LE
+        bytes (queued as-is) or as a sample array (copied once into a pooled frame
+        buffer). Returns False when the frame was dropped because the queue is full;
+        drops are logged once per DROPPED_FRAMES_LOG_EVERY frames.
+        """
+        if isinstance(audio_data, (bytes, bytearray)):
+            pcm = audio_data
+        else:
+            pcm = self.frame_pool.acquire(len(audio_data) * 2)
+            np.copyto(np.frombuffer(pcm, dtype="<i2"), audio_data, casting="unsafe")
+        if self.put_audio(pcm):
+            return True
+        self.frame_pool.release(pcm)
+        if self.dropped_frames % DROPPED_FRAMES_LOG_EVERY == 1:
+            logging.error("[%s] Audio queue full - dropping frames (%d dropped so far)", self.webrtc_id, self.dropped_frames)
+        return False
+
+    def get_audio(self, timeout: float) -> Optional[bytes]:
+        """Consumer side: pop the next chunk, waiting up to `timeout` seconds. None if nothing arrived."""
+        try:
+            return self.audio_queue.popleft()
+        except IndexError:
+            pass
+        # Clear, then re-check before sleeping so a put() racing with us isn't missed
+        self.audio_ready.clear()
+        if not self.audio_queue:
+            self.audio_ready.wait(timeout)
+        try:
+            return self.audio_queue.popleft()
+        except IndexError:
+            return None
+
     def reset_for_new_utterance(self):
         """Reset utterance-specific data while preserving session state"""
         self.session_transcript_fragments = []
         self.current_utterance_buffer = ""
         self.pronunciation_reports_cache = []
         self.current_pronunciation_report = None
-        self.audio_buffer = []
+        self.audio_buffer.clear()
         self.retry_count = 0
 
 # --- StreamingSessionState Dataclass ---
@@ -116,7 +208,7 @@ class StreamingSessionState:
             
         # Check for stuck connections
         if (self.streaming.recording_start_time and 
-            time.time() - self.streaming.recording_start_time > self.streaming.max_recording_seconds):
+            time.monotonic() - self.streaming.recording_start_time > self.streaming.max_recording_seconds):
             logging.warning("Session exceeded maximum duration")
             return False
             
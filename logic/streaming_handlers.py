@@ -32,7 +32,7 @@ def start_recording_handler(request: gr.Request, llm_service, tts_service, strea
         logger.warning(f"[start_recording_handler] Recording start failed: {message}")
         return gr.update(visible=True), gr.update(visible=False), message
 
-def stop_recording_handler(request: gr.Request, llm_service, tts_service, streaming_service):
+async def stop_recording_handler(request: gr.Request, llm_service, tts_service, streaming_service):
     """Stop recording and process results."""
     session_hash = request.session_hash
     logger.info(f"[stop_recording_handler] Called for session_hash: {session_hash}")
@@ -46,12 +46,12 @@ def stop_recording_handler(request: gr.Request, llm_service, tts_service, stream
         return gr.update(visible=True), gr.update(visible=False), "Error: No session found.", {}, None
 
     logger.info(f"[stop_recording_handler] Stopping recording via streaming_service")
-    success, transcript, report = streaming_service.stop_recording(session_state)
+    success, transcript, report = await streaming_service.stop_recording(session_state)
     logger.info(f"[stop_recording_handler] Recording stop result - success: {success}, transcript length: {len(transcript) if transcript else 0}")
 
     if success and session_hash:
         logger.info(f"[stop_recording_handler] Recording successful, calling chat_function")
-        display_history, ai_audio_path, _ = chat_function(
+        display_history, ai_audio_path, _ = await chat_function(
             session_state=session_state,
             pronunciation_report=report,
             user_transcript=transcript,
@@ -2,22 +2,12 @@
 
 import azure.cognitiveservices.speech as speechsdk
 import json
-import time
 import logging
 import wave
-import os
-import tempfile
-from typing import List, Optional
+import numpy as np
+from typing import List, Optional, Tuple
 from config import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION
-from logic.audio_models import AzurePronunciationReport, NBestResult, WordResult, PhonemeResult
-from pydantic import ValidationError
-
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    logging.warning("pydub not available, using fallback chunking method")
+from logic.audio_models import AzurePronunciationReport, NBestResult, PronunciationAssessmentResult
 
 class AzureSpeechService:
     def __init__(self):
@@ -46,7 +36,7 @@ class AzureSpeechService:
             
             logging.info("--- Azure Speech Service Initialized Successfully ---")
         except Exception as e:
-            logging.error(f"Error initializing Azure Speech Service: {e}", exc_info=True)
+            logging.error("Error initializing Azure Speech Service: %s", e, exc_info=True)
             self.speech_config = None
 
     def get_pronunciation_assessment(self, audio_filepath: str) -> Optional[AzurePronunciationReport]:
@@ -59,43 +49,60 @@ class AzureSpeechService:
             return None
 
         try:
-            # Get audio duration
-            duration = self._get_audio_duration(audio_filepath)
-            if duration is None:
-                logging.error("Could not determine audio duration")
+            # Read the file once; both processing paths reuse the loaded samples
+            loaded = self._load_audio(audio_filepath)
+            if loaded is None:
+                logging.error("Could not load audio")
                 return None
+            duration, samples, sample_rate = loaded
 
-            logging.info(f"Audio duration: {duration:.2f} seconds")
+            logging.info("Audio duration: %.2f seconds", duration)
 
             # Choose processing method based on duration
             if duration <= 25:  # Use simple method for short audio
                 logging.info("Using simple recognition for short audio")
-                return self._process_single_audio(audio_filepath)
+                return self._process_single_audio(samples, sample_rate)
             else:  # Use chunked method for long audio
                 logging.info("Using chunked recognition for long audio")
-                return self._process_chunked_audio(audio_filepath)
+                return self._process_chunked_audio(samples, sample_rate)
 
         except Exception as e:
-            logging.error(f"Error in pronunciation assessment: {e}", exc_info=True)
+            logging.error("Error in pronunciation assessment: %s", e, exc_info=True)
             return None
 
-    def _get_audio_duration(self, filepath: str) -> Optional[float]:
-        """Get audio duration in seconds"""
+    def _load_audio(self, filepath: str) -> Optional[Tuple[float, np.ndarray, int]]:
+        """Read a 16-bit PCM WAV file once, returning (duration, mono samples, sample rate)"""
         try:
             with wave.open(filepath, 'rb') as wav_file:
-                frames = wav_file.getnframes()
-                sample_rate = wav_file.getframerate()
-                duration = frames / float(sample_rate)
-                return duration
+                params = wav_file.getparams()
+                frames = wav_file.readframes(params.nframes)
         except Exception as e:
-            logging.error(f"Error getting audio duration: {e}")
+            logging.error("Error loading audio: %s", e)
+            return None
+
+        if params.sampwidth != 2:
+            logging.error("Unsupported sample width: %d-bit (expected 16-bit PCM)", params.sampwidth * 8)
             return None
 
-    def _process_single_audio(self, audio_filepath: str) -> Optional[AzurePronunciationReport]:
+        samples = np.frombuffer(frames, dtype="<i2")
+        if params.nchannels > 1:
+            # Azure expects mono input; downmix interleaved channels
+            samples = samples.reshape(-1, params.nchannels).mean(axis=1).astype("<i2")
+
+        duration = len(samples) / float(params.framerate)
+        return duration, samples, params.framerate
+
+    def _process_single_audio(self, samples: np.ndarray, sample_rate: int) -> Optional[AzurePronunciationReport]:
         """Process audio using single recognition (for short audio)"""
         try:
-            # Simple file-based audio config
-            audio_config = speechsdk.audio.AudioConfig(filename=audio_filepath)
+            # Feed the already-loaded PCM through an in-memory push stream
+            stream_format = speechsdk.audio.AudioStreamFormat(
+                samples_per_second=sample_rate, bits_per_sample=16, channels=1
+            )
+            push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+            push_stream.write(samples.tobytes())
+            push_stream.close()
+            audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
 
             # Create speech recognizer
             speech_recognizer = speechsdk.SpeechRecognizer(
@@ -121,7 +128,7 @@ class AzureSpeechService:
             result = speech_recognizer.recognize_once()
             
             if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logging.info(f"Recognized: {result.text}")
+                logging.info("Recognized: %s", result.text)
                 
                 # Get the detailed JSON result
                 pronunciation_result_json = result.properties.get(
@@ -147,34 +154,32 @@ class AzureSpeechService:
                 return None
 
         except Exception as e:
-            logging.error(f"Error in single audio processing: {e}", exc_info=True)
+            logging.error("Error in single audio processing: %s", e, exc_info=True)
             return None
 
-    def _process_chunked_audio(self, audio_filepath: str) -> Optional[AzurePronunciationReport]:
-        """Process long audio by splitting into chunks"""
+    def _process_chunked_audio(self, samples: np.ndarray, sample_rate: int, chunk_duration: int = 15) -> Optional[AzurePronunciationReport]:
+        """Process long audio by slicing the loaded samples into chunks"""
         try:
-            # Split audio into chunks
-            chunk_files = self._split_audio_into_chunks(audio_filepath, chunk_duration=15)
+            # Slicing the array creates views, so no PCM is copied or written to disk
+            chunk_samples = sample_rate * chunk_duration
+            chunks = [samples[i:i + chunk_samples] for i in range(0, len(samples), chunk_samples)]
             
-            if not chunk_files:
+            if not chunks:
                 logging.error("Failed to create audio chunks")
                 return None
 
-            logging.info(f"Created {len(chunk_files)} audio chunks")
+            logging.info("Created %d audio chunks", len(chunks))
 
             # Process each chunk
             chunk_results = []
-            for i, chunk_file in enumerate(chunk_files):
-                logging.info(f"Processing chunk {i+1}/{len(chunk_files)}")
+            for i, chunk in enumerate(chunks):
+                logging.info("Processing chunk %d/%d", i + 1, len(chunks))
                 
-                chunk_result = self._process_single_audio(chunk_file)
+                chunk_result = self._process_single_audio(chunk, sample_rate)
                 if chunk_result:
                     chunk_results.append(chunk_result)
                 else:
-                    logging.warning(f"Failed to process chunk {i+1}")
-
-            # Cleanup temporary chunk files
-            self._cleanup_chunk_files(chunk_files)
+                    logging.warning("Failed to process chunk %d", i + 1)
 
             if not chunk_results:
                 logging.error("No chunks were successfully processed")
@@ -182,81 +187,13 @@ class AzureSpeechService:
 
             # Combine all chunk results into a single report
             combined_result = self._combine_chunk_results(chunk_results)
-            logging.info(f"Successfully combined {len(chunk_results)} chunks")
+            logging.info("Successfully combined %d chunks", len(chunk_results))
             return combined_result
 
         except Exception as e:
-            logging.error(f"Error in chunked audio processing: {e}", exc_info=True)
+            logging.error("Error in chunked audio processing: %s", e, exc_info=True)
             return None
 
-    def _split_audio_into_chunks(self, audio_filepath: str, chunk_duration: int = 15) -> List[str]:
-        """Split audio file into smaller chunks"""
-        chunk_files = []
-        
-        try:
-            if PYDUB_AVAILABLE:
-                # Use pydub for better audio handling
-                audio = AudioSegment.from_wav(audio_filepath)
-                chunk_length_ms = chunk_duration * 1000
-                
-                for i in range(0, len(audio), chunk_length_ms):
-                    chunk = audio[i:i + chunk_length_ms]
-                    
-                    # Create temporary file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        chunk_path = temp_file.name
-                    
-                    # Export chunk
-                    chunk.export(chunk_path, format="wav", parameters=["-ar", "16000", "-ac", "1"])
-                    chunk_files.append(chunk_path)
-                    
-                logging.info(f"Created {len(chunk_files)} chunks using pydub")
-                
-            else:
-                # Fallback: use wave library (more limited)
-                chunk_files = self._split_audio_with_wave(audio_filepath, chunk_duration)
-                
-        except Exception as e:
-            logging.error(f"Error splitting audio: {e}")
-            return []
-            
-        return chunk_files
-
-    def _split_audio_with_wave(self, audio_filepath: str, chunk_duration: int) -> List[str]:
-        """Fallback method to split audio using wave library"""
-        chunk_files = []
-        
-        try:
-            with wave.open(audio_filepath, 'rb') as wav_file:
-                params = wav_file.getparams()
-                sample_rate = params.framerate
-                chunk_frames = sample_rate * chunk_duration
-                
-                chunk_num = 0
-                while True:
-                    frames = wav_file.readframes(chunk_frames)
-                    if not frames:
-                        break
-                    
-                    # Create chunk file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        chunk_path = temp_file.name
-                    
-                    with wave.open(chunk_path, 'wb') as chunk_file:
-                        chunk_file.setparams(params)
-                        chunk_file.writeframes(frames)
-                    
-                    chunk_files.append(chunk_path)
-                    chunk_num += 1
-                    
-                logging.info(f"Created {len(chunk_files)} chunks using wave library")
-                
-        except Exception as e:
-            logging.error(f"Error in wave-based splitting: {e}")
-            return []
-            
-        return chunk_files
-
     def _combine_chunk_results(self, chunk_results: List[AzurePronunciationReport]) -> AzurePronunciationReport:
         """Combine multiple chunk results into a single comprehensive report"""
         try:
@@ -269,8 +206,6 @@ class AzureSpeechService:
             # Calculate combined duration
             total_duration = sum([chunk.duration for chunk in chunk_results])
             
-            # Combine all NBest results
-            combined_nbest = []
             all_words = []
             
             # Collect all words and scores from all chunks
@@ -302,77 +237,62 @@ class AzureSpeechService:
             avg_pron = sum(all_pron_scores) / len(all_pron_scores)
             avg_prosody = sum(all_prosody_scores) / len(all_prosody_scores) if all_prosody_scores else None
             
-            # Create combined NBest result
-            combined_assessment = {
-                "AccuracyScore": avg_accuracy,
-                "FluencyScore": avg_fluency,
-                "CompletenessScore": avg_completeness,
-                "PronScore": avg_pron
-            }
-            
-            if avg_prosody is not None:
-                combined_assessment["ProsodyScore"] = avg_prosody
-            
-            combined_nbest_item = {
-                "Confidence": base_result.primary_result.confidence, #type: ignore
-                "Display": combined_text,
-                "PronunciationAssessment": combined_assessment,
-                "Words": [word.model_dump(by_alias=True) for word in all_words]
-            }
-            
-            # Create the final combined result
-            combined_result_dict = {
-                "Id": base_result.id,
-                "RecognitionStatus": "Success",
-                "DisplayText": combined_text,
-                "Offset": base_result.offset,
-                "Duration": total_duration,
-                "NBest": [combined_nbest_item]
-            }
+            # Build the combined report directly. Every chunk was already
+            # validated, so model_construct can skip validation entirely.
+            combined_assessment = PronunciationAssessmentResult.model_construct(
+                accuracy_score=avg_accuracy,
+                fluency_score=avg_fluency,
+                prosody_score=avg_prosody,
+                completeness_score=avg_completeness,
+                pron_score=avg_pron
+            )
             
-            # Add SNR if available
-            if base_result.snr is not None:
-                combined_result_dict["SNR"] = base_result.snr
+            combined_nbest_item = NBestResult.model_construct(
+                confidence=base_result.primary_result.confidence, #type: ignore
+                display=combined_text,
+                assessment=combined_assessment,
+                words=all_words
+            )
             
-            # Validate and return the combined result
-            combined_json = json.dumps(combined_result_dict)
-            combined_report = AzurePronunciationReport.model_validate_json(combined_json)
+            combined_report = AzurePronunciationReport.model_construct(
+                id=base_result.id,
+                recognition_status="Success",
+                display_text=combined_text,
+                offset=base_result.offset,
+                duration=total_duration,
+                snr=base_result.snr,
+                nbest=[combined_nbest_item]
+            )
             
-            logging.info(f"Successfully combined chunks: {len(all_words)} total words, "
-                        f"avg scores - Fluency: {avg_fluency:.1f}, Accuracy: {avg_accuracy:.1f}")
+            logging.info("Successfully combined chunks: %d total words, "
+                         "avg scores - Fluency: %.1f, Accuracy: %.1f",
+                         len(all_words), avg_fluency, avg_accuracy)
             
             return combined_report
             
         except Exception as e:
-            logging.error(f"Error combining chunk results: {e}")
+            logging.error("Error combining chunk results: %s", e)
             # Fallback: return the first chunk result
             return chunk_results[0]
 
     def _validate_result_structure(self, result_data: dict) -> bool:
         """Validate that the result has the required structure"""
-        try:
-            if result_data.get("RecognitionStatus") != "Success":
-                logging.error(f"Recognition status: {result_data.get('RecognitionStatus')}")
-                return False
-                
-            if "NBest" not in result_data or not result_data["NBest"]:
-                logging.error("No NBest data found")
-                return False
-                
-            nbest = result_data["NBest"][0]
-            if "Words" not in nbest or not nbest.get("Words"):
-                logging.error("No Words data found in NBest")
-                return False
-                
-            if "PronunciationAssessment" not in nbest:
-                logging.error("No PronunciationAssessment found in NBest")
-                return False
-                
+        # Checks run in order; only the failure path pays for logging
+        nbest = (result_data.get("NBest") or [None])[0]
+        if result_data.get("RecognitionStatus") != "Success":
+            failed = "RecognitionStatus=%r" % result_data.get("RecognitionStatus")
+        elif not isinstance(nbest, dict):
+            failed = "NBest[0] missing"
+        elif not nbest.get("Words"):
+            failed = "NBest[0].Words missing or empty"
+        elif "PronunciationAssessment" not in nbest:
+            failed = "NBest[0].PronunciationAssessment missing"
+        else:
             return True
-            
-        except Exception as e:
-            logging.error(f"Error validating result structure: {e}")
-            return False
+        logging.error("Invalid result structure: %s", failed)
+        # The full payload holds the transcript and per-word scores; keep it out of ERROR logs
+        logging.debug("Invalid result payload: %s", result_data)
+        return False
 
     def _log_recognition_failure(self, result):
         """Log detailed information about recognition failure"""
@@ -380,17 +300,9 @@ class AzureSpeechService:
             logging.error("No speech could be recognized")
         elif result.reason == speechsdk.ResultReason.Canceled:
             cancellation_details = result.cancellation_details
-            logging.error(f"Speech recognition canceled: {cancellation_details.reason}")
+            logging.error("Speech recognition canceled: %s", cancellation_details.reason)
             if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                logging.error(f"Error details: {cancellation_details.error_details}")
-
-    def _cleanup_chunk_files(self, chunk_files: List[str]):
-        """Clean up temporary chunk files"""
-        for chunk_file in chunk_files:
-            try:
-                os.unlink(chunk_file)
-            except Exception as e:
-                logging.warning(f"Failed to delete chunk file {chunk_file}: {e}")
+                logging.error("Error details: %s", cancellation_details.error_details)
 
     def test_basic_recognition(self, audio_filepath: str) -> str: #type: ignore
         """Test basic speech recognition without pronunciation assessment"""
@@ -408,7 +320,7 @@ class AzureSpeechService:
             result = speech_recognizer.recognize_once()
             
             if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logging.info(f"SUCCESS: Recognized text: {result.text}")
+                logging.info("SUCCESS: Recognized text: %s", result.text)
                 return f"SUCCESS: {result.text}"
             elif result.reason == speechsdk.ResultReason.NoMatch:
                 return "ERROR: No speech recognized"
@@ -418,5 +330,5 @@ class AzureSpeechService:
                 return error_msg
                 
         except Exception as e:
-            logging.error(f"Error in basic recognition test: {e}", exc_info=True)
+            logging.error("Error in basic recognition test: %s", e, exc_info=True)
             return f"EXCEPTION: {str(e)}"
\ No newline at end of file
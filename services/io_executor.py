@@ -0,0 +1,16 @@
+# <-- Shared Speech I/O Executor: one bounded pool for blocking TTS/STT work
+# In: services/io_executor.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Sized well inside the Google TTS quota (~300 req/min, about 5/s)
+SPEECH_IO_WORKERS = 8
+
+SPEECH_IO_EXECUTOR = ThreadPoolExecutor(max_workers=SPEECH_IO_WORKERS, thread_name_prefix="speech-io")
+
+async def run_speech_io(func, *args, **kwargs):
+    """Runs a blocking call on the shared speech I/O pool instead of the loop's default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(SPEECH_IO_EXECUTOR, functools.partial(func, *args, **kwargs))
@@ -1,38 +1,207 @@
 # <-- Gemini Adapter: handles all LLM interaction
 # In: services/llm_service.py
 
-import google.generativeai as genai
-from config import GEMINI_API_KEY
-import sys
+from config import GEMINI_API_KEY, USE_SEMANTIC_CACHE
 import time
 import logging
+import asyncio
+import hashlib
+import orjson
+import threading
+import functools
+from collections import OrderedDict
 from logic.ielts_models import IELTSFeedback, IELTSFinalReport  # our Pydantic models
 from pydantic import ValidationError
-from typing import Optional
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    from services.semantic_cache import SemanticResponseCache
+
+logger = logging.getLogger(__name__)
+
+# --- Exact-match response cache ---
+# Keyed by sha256(model | prompt | temperature); holds parsed Pydantic objects
+# so repeated evaluations skip the Gemini round trip and the JSON parse.
+RESPONSE_CACHE_MAX_SIZE = 1024
+
+# Backstop for conversations whose teardown never arrives (e.g. a dropped
+# connection): the least recently used ChatSession is released beyond this.
+MAX_CHAT_SESSIONS = 256
+_response_cache: "OrderedDict[str, IELTSFeedback | IELTSFinalReport]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _response_cache_key(model_name: str, prompt: str, temperature: float) -> str:
+    return hashlib.sha256(f"{model_name}|{prompt}|{temperature}".encode()).hexdigest()
+
+def _response_cache_get(key: str):
+    """Returns a copy of the cached object (LRU-touched), or None on a miss."""
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is None:
+            return None
+        _response_cache.move_to_end(key)
+    # Callers may mutate the result (e.g. the final band score), so hand out a copy
+    return cached.model_copy(deep=True)
+
+def _response_cache_put(key: str, value) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = value.model_copy(deep=True)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_MAX_SIZE:
+            _response_cache.popitem(last=False)
+
+# --- JSON body extraction ---
+def _extract_json_object(text: str) -> str:
+    """
+    Returns the first balanced {...} object in text, found in a single forward
+    pass. Braces inside string literals are ignored, so trailing prose or a '}'
+    within a value can't end the object early or late. Returns '' if none.
+    """
+    start = text.find('{')
+    if start < 0:
+        return ''
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return ''
+
+def _load_json_body(text: str):
+    """
+    Parses a model response as JSON. JSON mode normally returns a bare object;
+    if the model wrapped it in prose or a code fence, fall back to extracting it.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        extracted = _extract_json_object(text)
+        if not extracted:
+            raise
+        return orjson.loads(extracted)
+
+# --- SDK configuration ---
+# genai.configure() discards the SDK's cached API clients, and with them their
+# persistent HTTP/2 gRPC channels. Configure once per process so every
+# GeminiChat shares the same pooled, already-handshaken connections.
+_genai_configured = False
+_genai_configure_lock = threading.Lock()
+
+def _configure_genai(genai) -> None:
+    global _genai_configured
+    with _genai_configure_lock:
+        if not _genai_configured:
+            genai.configure(api_key=GEMINI_API_KEY)
+            _genai_configured = True
+
+# --- Retry policy for transient API failures ---
+# Rate limits (429) and 5xx errors are retried with jittered exponential backoff.
+# Validation failures and blocked prompts are deterministic and never retried.
+def _is_transient_error(exc: BaseException) -> bool:
+    # Imported here so the google SDK stays unloaded until a request is made
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(exc, (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+    ))
+
+def _log_retry(retry_state) -> None:
+    logger.warning(
+        "API: Gemini | status=retrying | attempt=%d | error=%s",
+        retry_state.attempt_number, retry_state.outcome.exception()
+    )
+
+_retry_transient = retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    retry=retry_if_exception(_is_transient_error),
+    before_sleep=_log_retry,
+    reraise=True,
+)
 
 class GeminiChat:
-    def __init__(self):
+    def __init__(self, use_semantic_cache: bool = USE_SEMANTIC_CACHE):
         """
         Initializes the Gemini model.
+
+        Args:
+            use_semantic_cache: Serve paraphrased conversational prompts from an
+                embedding-similarity cache (requires sentence-transformers + faiss).
         """
+        # One SDK ChatSession per conversation so the history prefix stays stable.
+        # Released by end_chat_session when the app tears a session down.
+        self.chat_sessions: "OrderedDict[str, genai.ChatSession]" = OrderedDict()
+        # Models carrying a system instruction, keyed by the instruction text.
+        # Callers pass a fixed persona, so this holds one or two entries.
+        self._instructed_models: dict[str, "genai.GenerativeModel"] = {}
+        self.semantic_cache: Optional["SemanticResponseCache"] = None
+        if use_semantic_cache:
+            # Imported only when enabled: it loads faiss, sentence-transformers and torch
+            from services.semantic_cache import SemanticResponseCache, SEMANTIC_CACHE_AVAILABLE
+            if SEMANTIC_CACHE_AVAILABLE:
+                try:
+                    self.semantic_cache = SemanticResponseCache()
+                except Exception as e:
+                    logger.error("Error initializing semantic cache: %s", e)
+            else:
+                logger.warning("use_semantic_cache requested but its dependencies are missing.")
+
         if not GEMINI_API_KEY:
-            print("FATAL ERROR: GEMINI_API_KEY is not set.", file=sys.stderr)
+            logger.critical("GEMINI_API_KEY is not set.")
             self.model = None
             return
 
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
+            # Imported lazily: the SDK pulls in grpc and protobuf descriptors,
+            # which is wasted startup time when no API key is configured.
+            import google.generativeai as genai
+            self._genai = genai
+            _configure_genai(genai)
             # Using Gemini 1.5 Flash for speed and cost-effectiveness
             self.model = genai.GenerativeModel('gemini-2.0-flash')
-            print("--- Gemini Model Initialized Successfully ---")
+
+            # Only two generation configs are ever used; build them (and their
+            # JSON-mode response schemas) once instead of on every call.
+            self._feedback_cfg = genai.types.GenerationConfig(
+                temperature=0.75,  # Adjust temperature for creativity vs. accuracy
+                response_mime_type="application/json",
+                response_schema=IELTSFeedback,
+            )
+            self._final_cfg = genai.types.GenerationConfig(
+                temperature=0.7,
+                response_mime_type="application/json",
+                response_schema=IELTSFinalReport,
+            )
+            logger.info("--- Gemini Model Initialized Successfully ---")
         except Exception as e:
-            print(f"Error initializing Gemini Model: {e}", file=sys.stderr)
+            logger.error("Error initializing Gemini Model: %s", e)
             self.model = None
 
-    def get_response(
+    async def get_response(
         self, 
         full_prompt: str, 
-        chat_history: Optional[list] = None
+        chat_history: Optional[list] = None,
+        session_id: Optional[str] = None,
+        semantic_key: Optional[str] = None,
+        system_instruction: Optional[str] = None
     ) -> str:
         """
         Gets a response from the Gemini model. This method is flexible and can handle:
@@ -42,6 +211,15 @@ class GeminiChat:
         Args:
             full_prompt: The final, complete prompt to be sent to the model.
             chat_history: A list of previous turns in the conversation.
+            session_id: Identifies the conversation. When given, the turn is sent
+                through a reusable ChatSession and semantic cache entries are
+                scoped to it.
+            semantic_key: The text to match in the semantic cache (e.g. the raw user
+                utterance, without the static persona prompt). The cache is only
+                consulted when both session_id and semantic_key are given.
+            system_instruction: A static persona/instruction prompt. It is set as the
+                model's system instruction instead of being prepended to full_prompt,
+                so a ChatSession's stored history never repeats it turn after turn.
 
         Returns:
             The model's text response.
@@ -49,15 +227,37 @@ class GeminiChat:
         if not self.model:
             return "Error: Gemini model is not initialized."
 
+        embedding = None
+        if self.semantic_cache and session_id and semantic_key:
+            embedding = await asyncio.to_thread(self.semantic_cache.embed, semantic_key)
+            if (cached := self.semantic_cache.lookup(session_id, embedding)) is not None:
+                logger.info("API: Gemini.generate_content | status=semantic_cache_hit")
+                return cached
+
         start_time = time.time()
         try:
-            logging.info(f"API: Gemini.generate_content | status=starting")
-            # --- Build the message list in the format the API expects ---
-            messages = chat_history or []
-            messages.append({"role": "user", "parts": [{"text": full_prompt}]})
+            logger.info("API: Gemini.generate_content | status=starting")
+            model = self._model_for(system_instruction)
+            if session_id:
+                # --- Reuse the conversation's ChatSession; the SDK keeps the history ---
+                history = chat_history or []
+                chat = self.chat_sessions.get(session_id)
+                if chat is None or len(chat.history) != len(history):
+                    # First turn, or the conversation advanced outside this session
+                    # (e.g. a one-shot feedback turn): reseed from the caller's history.
+                    chat = model.start_chat(history=history)
+                    self.chat_sessions[session_id] = chat
+                    while len(self.chat_sessions) > MAX_CHAT_SESSIONS:
+                        self.end_chat_session(next(iter(self.chat_sessions)))
+                self.chat_sessions.move_to_end(session_id)
+                response = await self._call_with_retry(chat.send_message_async, full_prompt)
+            else:
+                # --- Build the message list in the format the API expects ---
+                messages = chat_history or []
+                messages.append({"role": "user", "parts": [{"text": full_prompt}]})
 
-            # --- Generate the content ---
-            response = self.model.generate_content(messages)
+                # --- Generate the content ---
+                response = await self._call_with_retry(model.generate_content_async, messages)
             elapsed = time.time() - start_time
             
             # Try to get token count if available
@@ -67,134 +267,307 @@ class GeminiChat:
                     token_info = f" | tokens={response.usage_metadata.total_token_count}"
             except (AttributeError, TypeError) as e:
                 # Silently ignore if token metadata is unavailable or has unexpected structure
-                logging.debug(f"Could not extract token count from response: {e}")
+                logger.debug("Could not extract token count from response: %s", e)
 
             
-            logging.info(f"API: Gemini.generate_content | status=success | duration={elapsed:.2f}s{token_info}")
+            logger.info("API: Gemini.generate_content | status=success | duration=%.2fs%s", elapsed, token_info)
             
             if response and response.parts:
+                if embedding is not None:
+                    self.semantic_cache.add(session_id, embedding, response.text) # type: ignore
                 return response.text
             # Handle cases where the response might be blocked or empty
             elif response.prompt_feedback and str(response.prompt_feedback.block_reason) != "BlockReason.BLOCK_REASON_UNSPECIFIED":
                 error_msg = f"LLM response blocked due to: {response.prompt_feedback.block_reason}"
-                print(f"ERROR: {error_msg}", file=sys.stderr)
+                logger.error(error_msg)
                 return f"Sorry, I can't respond to that. ({response.prompt_feedback.block_reason})"
             else:
                 return "Sorry, I couldn't think of a response."
         except Exception as e:
             elapsed = time.time() - start_time
-            logging.error(f"API: Gemini.generate_content | status=error | duration={elapsed:.2f}s | error={str(e)}")
-            print(f"Error getting response from Gemini: {e}", file=sys.stderr)
+            logger.error("API: Gemini.generate_content | status=error | duration=%.2fs | error=%s", elapsed, e)
             return "Sorry, I encountered an error. Could you please repeat that?"
         
-    def get_structured_feedback(self, prompt: str) -> IELTSFeedback | str:
+    async def stream_response(self, full_prompt: str, chat_history: Optional[list] = None) -> AsyncIterator[str]:
+        """
+        Streaming variant of get_response: yields text chunks as Gemini decodes
+        them, so the caller can render from the first token instead of waiting
+        for the whole completion. Use get_response when a final string is needed.
+        """
+        if not self.model:
+            yield "Error: Gemini model is not initialized."
+            return
+
+        messages = list(chat_history or [])
+        messages.append({"role": "user", "parts": [{"text": full_prompt}]})
+
+        start_time = time.time()
+        first_chunk_at = None
+        try:
+            logger.info("API: Gemini.generate_content(stream) | status=starting")
+            response = await self.model.generate_content_async(messages, stream=True)
+            async for chunk in response:
+                if chunk.parts and chunk.text:
+                    if first_chunk_at is None:
+                        first_chunk_at = time.time() - start_time
+                    yield chunk.text
+            elapsed = time.time() - start_time
+            ttft = f"{first_chunk_at:.2f}s" if first_chunk_at is not None else "n/a"
+            logger.info("API: Gemini.generate_content(stream) | status=success | ttft=%s | duration=%.2fs", ttft, elapsed)
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.error("API: Gemini.generate_content(stream) | status=error | duration=%.2fs | error=%s", elapsed, e)
+            yield "Sorry, I encountered an error. Could you please repeat that?"
+
+    def _model_for(self, system_instruction: Optional[str]) -> "genai.GenerativeModel":
+        """Returns the base model, or a cached copy of it carrying the given system instruction."""
+        if not system_instruction:
+            return self.model
+        model = self._instructed_models.get(system_instruction)
+        if model is None:
+            model = self._genai.GenerativeModel(self.model.model_name, system_instruction=system_instruction)
+            self._instructed_models[system_instruction] = model
+        return model
+
+    @staticmethod
+    @_retry_transient
+    async def _call_with_retry(call, *args, **kwargs):
+        """Awaits an SDK coroutine, retrying on rate limits and transient 5xx errors."""
+        return await call(*args, **kwargs)
+
+    def end_chat_session(self, session_id: str) -> None:
+        """Releases the ChatSession and any semantic cache entries for a conversation."""
+        self.chat_sessions.pop(session_id, None)
+        if self.semantic_cache:
+            self.semantic_cache.clear(session_id)
+
+    async def get_structured_feedback(self, prompt: str, force_fresh: bool = False) -> IELTSFeedback | str:
         """
         Gets a structured JSON response from the Gemini model and parses it
         into our IELTSFeedback Pydantic model.
+
+        Identical prompts are served from an in-process LRU cache unless
+        force_fresh is True.
         """
         if not self.model:
             return "Error: Gemini model is not initialized."
 
+        cache_key = _response_cache_key(self.model.model_name, prompt, 0.75)
+        if not force_fresh and (cached := _response_cache_get(cache_key)) is not None:
+            logger.info("API: Gemini.get_structured_feedback | status=cache_hit")
+            return cached
+
         start_time = time.time()
+        raw = None  # decoded response body, read once
         try:
-            logging.info(f"API: Gemini.get_structured_feedback | status=starting")
-            generation_config = genai.types.GenerationConfig(
-                temperature=0.75,  # Adjust temperature for creativity vs. accuracy
-            )
-
-            response = self.model.generate_content(
+            logger.info("API: Gemini.get_structured_feedback | status=starting")
+            # JSON mode: Gemini emits a body that conforms to the IELTSFeedback schema
+            response = await self._call_with_retry(
+                self.model.generate_content_async,
                 prompt,
-                generation_config=generation_config
+                generation_config=self._feedback_cfg
             )
-            raw_response_text = response.text
-
-            # --- Step 1: Clean the response to isolate the JSON object ---
-            start_index = raw_response_text.find('{')
-            end_index = raw_response_text.rfind('}')
-            
-            if start_index == -1 or end_index == -1:
-                error_msg = f"Error: LLM response did not contain a valid JSON object. Response: {raw_response_text}"
-                print(error_msg, file=sys.stderr)
-                return error_msg
-
-            json_string = raw_response_text[start_index : end_index + 1]
             
-            # --- Step 2: Parse and validate the JSON string into our Pydantic model ---
-            print("LOG: Received response. Validating JSON...")
-            feedback_data = IELTSFeedback.model_validate_json(json_string)
-            print("LOG: JSON validation successful.")
+            # --- Parse and validate the JSON body into our Pydantic model ---
+            raw = response.text
+            logger.debug("Received response. Validating JSON...")
+            feedback_data = IELTSFeedback.model_validate(_load_json_body(raw))
+            logger.debug("JSON validation successful.")
+            _response_cache_put(cache_key, feedback_data)
             
             elapsed = time.time() - start_time
-            logging.info(f"API: Gemini.get_structured_feedback | status=success | duration={elapsed:.2f}s")
+            logger.info("API: Gemini.get_structured_feedback | status=success | duration=%.2fs", elapsed)
             return feedback_data
 
-        except ValidationError as e:
-            # Pydantic will raise a ValidationError if the JSON is malformed
-            # or missing fields. This is our safety net.
+        except (ValidationError, orjson.JSONDecodeError) as e:
+            # orjson raises on malformed JSON and Pydantic raises a ValidationError
+            # on missing fields. This is our safety net.
             error_message = f"Error: Pydantic validation failed. The LLM's JSON output did not match our schema. Details: {e}"
-            print(error_message, file=sys.stderr)
+            logger.error(error_message)
             return error_message
         except Exception as e:
             # This block is crucial for debugging when the LLM fails to produce valid JSON
             error_message = f"Error generating or parsing structured feedback: {e}"
-            print(error_message, file=sys.stderr)
-            try:
+            logger.error(error_message)
+            if raw is not None:
                 # Add this to see what the model actually returned
-                print("---RAW LLM RESPONSE---")
-                print(response.text)
-                print("------------------------")
-            except NameError:
-                pass # response might not exist if the error was earlier
+                logger.error("---RAW LLM RESPONSE---\n%s", raw)
             
             elapsed = time.time() - start_time
-            logging.error(f"API: Gemini.get_structured_feedback | status=error | duration={elapsed:.2f}s")
+            logger.error("API: Gemini.get_structured_feedback | status=error | duration=%.2fs", elapsed)
             return "Sorry, I encountered an error while generating feedback. The format of the response was not as expected."
-    
-    def get_final_report(self, prompt: str) -> IELTSFinalReport | str:
+
+    async def get_structured_feedback_batch(
+        self,
+        prompts: list[str],
+        max_concurrency: int = 16
+    ) -> list[IELTSFeedback | str | BaseException]:
+        """
+        Runs get_structured_feedback for several independent prompts concurrently,
+        so N answers cost roughly one round trip instead of N.
+
+        Args:
+            prompts: One feedback prompt per answer.
+            max_concurrency: Cap on in-flight Gemini requests, to stay under the
+                API rate limit.
+
+        Returns:
+            Results in the same order as prompts. A failed call yields its
+            exception instead of aborting the whole batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(prompt: str):
+            async with semaphore:
+                return await self.get_structured_feedback(prompt)
+
+        return await asyncio.gather(*(_one(p) for p in prompts), return_exceptions=True)
+
+    async def get_final_report(self, prompt: str, force_fresh: bool = False) -> IELTSFinalReport | str:
         """
         Gets a structured JSON response for the final report and parses it
         into our IELTSFinalReport Pydantic model.
+
+        Identical prompts are served from an in-process LRU cache unless
+        force_fresh is True.
         """
         if not self.model:
             return "Error: Gemini model is not initialized."
 
+        cache_key = _response_cache_key(self.model.model_name, prompt, 0.7)
+        if not force_fresh and (cached := _response_cache_get(cache_key)) is not None:
+            logger.info("API: Gemini.get_final_report | status=cache_hit")
+            return cached
+
         start_time = time.time()
+        raw = None  # decoded response body, read once
         try:
-            logging.info(f"API: Gemini.get_final_report | status=starting")
-            # Use the same robust method as before: instruct via prompt
-            # and validate the response.
-            generation_config = genai.types.GenerationConfig(
-                temperature=0.7,
-            )
-            
-            response = self.model.generate_content(
+            logger.info("API: Gemini.get_final_report | status=starting")
+            # JSON mode: Gemini emits a body that conforms to the IELTSFinalReport schema
+            response = await self._call_with_retry(
+                self.model.generate_content_async,
                 prompt,
-                generation_config=generation_config
+                generation_config=self._final_cfg
             )
-
-            # Clean the response to find the JSON object
-            json_text = response.text[response.text.find('{'):response.text.rfind('}')+1]
             
-            # Parse and validate the JSON against our final report model
-            # --- Step 2: Parse and validate the JSON string into our Pydantic model ---
-            print("LOG: Received response. Validating JSON...")
-            final_report_data = IELTSFinalReport.model_validate_json(json_text)
-            print("LOG: JSON validation successful.")
+            # --- Parse and validate the JSON body against our final report model ---
+            raw = response.text
+            logger.debug("Received response. Validating JSON...")
+            final_report_data = IELTSFinalReport.model_validate(_load_json_body(raw))
+            logger.debug("JSON validation successful.")
+            _response_cache_put(cache_key, final_report_data)
             
             elapsed = time.time() - start_time
-            logging.info(f"API: Gemini.get_final_report | status=success | duration={elapsed:.2f}s")
+            logger.info("API: Gemini.get_final_report | status=success | duration=%.2fs", elapsed)
             return final_report_data
 
         except Exception as e:
             error_message = f"Error generating or parsing final report: {e}"
-            print(error_message, file=sys.stderr)
-            try:
-                print("---RAW LLM RESPONSE (Final Report)---")
-                print(response.text)
-                print("------------------------------------")
-            except NameError:
-                pass
+            logger.error(error_message)
+            if raw is not None:
+                logger.error("---RAW LLM RESPONSE (Final Report)---\n%s", raw)
             
             elapsed = time.time() - start_time
-            logging.error(f"API: Gemini.get_final_report | status=error | duration={elapsed:.2f}s")
-            return "Sorry, I encountered an error while generating the final report."
\ No newline at end of file
+            logger.error("API: Gemini.get_final_report | status=error | duration=%.2fs", elapsed)
+            return "Sorry, I encountered an error while generating the final report."
+
+    # --- Batch Mode (offline final reports) ---
+    # Gemini's Batch API is billed at roughly half the live price and is not
+    # subject to the interactive QPS limits, at the cost of a minutes-to-hours
+    # turnaround. Only the newer google-genai SDK exposes it, so it is optional.
+    _BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+    def _get_batch_client(self):
+        """Lazily creates the google-genai client used for Batch Mode."""
+        if getattr(self, "_batch_client", None) is None:
+            try:
+                from google import genai as google_genai
+            except ImportError as e:
+                raise RuntimeError("Batch Mode requires the optional 'google-genai' package.") from e
+            self._batch_client = google_genai.Client(api_key=GEMINI_API_KEY)
+        return self._batch_client
+
+    async def submit_final_report_batch(self, prompts: list[str]) -> str:
+        """
+        Submits final-report prompts as one inline Batch Mode job, for scheduled
+        (non-interactive) report generation. Use get_final_report for real-time.
+
+        Returns:
+            The batch job name, to be passed to fetch_final_report_batch.
+        """
+        client = self._get_batch_client()
+        requests = [
+            {
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "config": {
+                    "temperature": 0.7,
+                    "response_mime_type": "application/json",
+                    "response_schema": IELTSFinalReport,
+                },
+            }
+            for prompt in prompts
+        ]
+        job = await client.aio.batches.create(
+            model="gemini-2.0-flash",
+            src=requests,
+            config={"display_name": f"ielts-final-reports-{int(time.time())}"},
+        )
+        logger.info("API: Gemini.batches.create | status=submitted | job=%s | requests=%d", job.name, len(prompts))
+        return job.name
+
+    async def fetch_final_report_batch(self, batch_name: str) -> Optional[list[IELTSFinalReport | str]]:
+        """
+        Checks a Batch Mode job once.
+
+        Returns:
+            None while the job is still running; otherwise one parsed
+            IELTSFinalReport (or an error string) per submitted prompt, in order.
+        """
+        client = self._get_batch_client()
+        job = await client.aio.batches.get(name=batch_name)
+        state = job.state.name
+        if state not in self._BATCH_DONE_STATES:
+            return None
+
+        logger.info("API: Gemini.batches.get | status=%s | job=%s", state, batch_name)
+        if state != "JOB_STATE_SUCCEEDED":
+            return [f"Error: batch job ended in state {state}."]
+
+        reports: list[IELTSFinalReport | str] = []
+        for inlined in job.dest.inlined_responses:
+            if inlined.error:
+                reports.append(f"Error generating final report: {inlined.error}")
+                continue
+            try:
+                reports.append(IELTSFinalReport.model_validate(_load_json_body(inlined.response.text)))
+            except (ValidationError, orjson.JSONDecodeError) as e:
+                reports.append(f"Error: the LLM's JSON output did not match our schema. Details: {e}")
+        return reports
+
+    async def await_final_report_batch(self, batch_name: str, poll_interval: float = 30.0) -> list[IELTSFinalReport | str]:
+        """Polls a Batch Mode job every poll_interval seconds until it finishes."""
+        while (reports := await self.fetch_final_report_batch(batch_name)) is None:
+            await asyncio.sleep(poll_interval)
+        return reports
+
+
+# --- Warm Pydantic validators at import ---
+# Resolve any forward references now and push one dry-run payload through
+# each validator, so the first real request doesn't pay the setup cost.
+for _model in (IELTSFeedback, IELTSFinalReport):
+    try:
+        _model.model_rebuild()
+        _model.model_validate_json(b"{}")
+    except ValidationError:
+        pass  # expected: the empty stub is missing required fields
+    except Exception as e:
+        logger.debug("Validator warm-up skipped for %s: %s", _model.__name__, e)
+
+@functools.cache
+def get_gemini_chat() -> GeminiChat:
+    """
+    Returns the process-wide GeminiChat. Building one configures the SDK and
+    the model, so request handlers should share this instance rather than
+    constructing their own.
+    """
+    return GeminiChat()
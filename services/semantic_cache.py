@@ -0,0 +1,66 @@
+# <-- Semantic Response Cache: embedding-similarity cache in front of the LLM
+# In: services/semantic_cache.py
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if not SEMANTIC_CACHE_AVAILABLE:
+    logger.warning("sentence-transformers/faiss not available, semantic cache disabled")
+
+class SemanticResponseCache:
+    """
+    Returns a previously generated response when a new query is a close
+    paraphrase of an earlier one. Entries are partitioned per user so that
+    replies never leak across conversations.
+    """
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92):
+        # Loaded once at startup; encoding a short utterance takes a few ms
+        self.encoder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self._dim = self.encoder.get_sentence_embedding_dimension()
+        self._indexes: Dict[str, "faiss.IndexFlatIP"] = {}
+        self._responses: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        logger.info("--- Semantic cache initialized (model=%s, threshold=%s) ---", model_name, threshold)
+
+    def embed(self, text: str) -> "np.ndarray":
+        """Returns a (1, dim) float32, L2-normalized embedding (inner product == cosine)."""
+        embedding = self.encoder.encode(text, normalize_embeddings=True)
+        return np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+
+    def lookup(self, user_id: str, embedding: "np.ndarray") -> Optional[str]:
+        """Returns the cached response for the nearest stored query, if similar enough."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None or index.ntotal == 0:
+                return None
+            scores, ids = index.search(embedding, 1)
+            if scores[0, 0] > self.threshold:
+                return self._responses[user_id][ids[0, 0]]
+        return None
+
+    def add(self, user_id: str, embedding: "np.ndarray", response: str) -> None:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = faiss.IndexFlatIP(self._dim)
+                self._responses[user_id] = []
+            index.add(embedding)
+            self._responses[user_id].append(response)
+
+    def clear(self, user_id: str) -> None:
+        """Drops every cached entry for one user (e.g. when their session ends)."""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+            self._responses.pop(user_id, None)
@@ -1,18 +1,29 @@
 # In: services/streaming_speech_service.py
 
-import logging
 import asyncio
+import logging
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import time
-import json
-from typing import List, Optional, Tuple
+import orjson
+from collections import deque
+from itertools import chain
+from typing import List, Optional, Tuple, Union
 import azure.cognitiveservices.speech as speechsdk # type: ignore
 from logic.session_models import StreamingSessionState
 from logic.audio_models import AzurePronunciationReport
 from pydantic import ValidationError
 from config import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION
 
+logger = logging.getLogger(__name__)
+
+# Upper bound on a single push_stream.write (2 s of 16 kHz audio)
+MAX_WRITE_BYTES = 16000 * 2 * 2  # 2 s of 16 kHz PCM16
+
+# Number of pre-built, pre-connected recognizers kept ready for new sessions
+RECOGNIZER_POOL_SIZE = 2
 
 class StreamingAudioService:
     """
@@ -28,8 +39,16 @@ class StreamingAudioService:
     
     def __init__(self):
         """Initialize Azure Speech Service with enhanced configuration"""
+        # Single worker that parses and stores recognition JSON, keeping that
+        # work off the Azure SDK's callback thread (one worker keeps fragment order)
+        self._fragment_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="azure-fragments")
+
+        # Warm recognizers waiting for a session, refilled in the background
+        self._recognizer_pool: "queue.Queue[Tuple[speechsdk.audio.PushAudioInputStream, speechsdk.SpeechRecognizer]]" = queue.Queue(maxsize=RECOGNIZER_POOL_SIZE)
+        self._pool_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="azure-recognizer-pool")
+
         if not all([AZURE_SPEECH_KEY, AZURE_SPEECH_REGION]):
-            logging.critical("AZURE_SPEECH_KEY or AZURE_SPEECH_REGION is not set.")
+            logger.critical("AZURE_SPEECH_KEY or AZURE_SPEECH_REGION is not set.")
             self.speech_config = None
             return
 
@@ -50,10 +69,21 @@ class StreamingAudioService:
             self.speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
             # self.speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "3000"
             
-            logging.info("Enhanced Azure Speech Service initialized successfully")
+            # Pronunciation assessment settings are identical for every session, so
+            # build the config once; apply_to() binds it to each new recognizer
+            self.pronunciation_config = speechsdk.PronunciationAssessmentConfig(
+                reference_text="",  # Empty for conversational speech
+                grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark,
+                granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme,
+                enable_miscue=False
+            )
+            self.pronunciation_config.enable_prosody_assessment()
+            
+            logger.info("Enhanced Azure Speech Service initialized successfully")
+            self._pool_executor.submit(self._refill_recognizer_pool)
             
         except Exception as e:
-            logging.error(f"Error initializing Azure Speech Service: {e}", exc_info=True)
+            logger.error("Error initializing Azure Speech Service: %s", e, exc_info=True)
             self.speech_config = None
 
     def setup_azure_recognizer(self, session_state: StreamingSessionState) -> bool:
@@ -63,27 +93,12 @@ class StreamingAudioService:
         """
         try:
             if not self.speech_config:
-                logging.error("Speech config not initialized, cannot start session")
+                logger.error("Speech config not initialized, cannot start session")
                 session_state.streaming.last_error = "Azure configuration invalid"
                 return False
                 
-            # 1. Create push stream and recognizer (from your service)
-            push_stream = speechsdk.audio.PushAudioInputStream()
-            audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
-            recognizer = speechsdk.SpeechRecognizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-            
-            # 2. Configure pronunciation assessment (enhanced from your service)
-            pronunciation_config = speechsdk.PronunciationAssessmentConfig(
-                reference_text="",  # Empty for conversational speech
-                grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark,
-                granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme,
-                enable_miscue=False
-            )
-            pronunciation_config.enable_prosody_assessment()
-            pronunciation_config.apply_to(recognizer)
+            # 1-2. Take a warm push stream + recognizer (pronunciation config already applied)
+            push_stream, recognizer = self._take_recognizer()
             
             # 3. Setup enhanced event handlers (combines POC + your service logic)
             def on_recognized(evt: speechsdk.SpeechRecognitionEventArgs):
@@ -91,19 +106,15 @@ class StreamingAudioService:
                 if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
                     utterance = evt.result.text.strip()
                     fragment_count = len(session_state.streaming.session_transcript_fragments)
-                    logging.info(f"API: Azure.fragment_received | status=success | fragment_num={fragment_count + 1}")
-                    logging.info(f"[{session_state.streaming.webrtc_id}] RECOGNIZED: '{utterance}'")
+                    logger.info("API: Azure.fragment_received | status=success | fragment_num=%s", fragment_count + 1)
+                    logger.info("[%s] RECOGNIZED: '%s'", session_state.streaming.webrtc_id, utterance)
                     
                     if utterance:
                         # Extract and store JSON result (from your service approach)
                         json_result = evt.result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
                         if json_result:
-                            try:
-                                pronunciation_data = json.loads(json_result)
-                                session_state.streaming.session_transcript_fragments.append(pronunciation_data)
-                                logging.info(f"[{session_state.streaming.webrtc_id}] Pronunciation data extracted and stored")
-                            except json.JSONDecodeError as e:
-                                logging.error(f"Failed to parse JSON result: {e}")
+                            # Parse + store on the fragment worker, not the SDK callback thread
+                            self._fragment_executor.submit(self._store_fragment, session_state, json_result)
                         
                         # Update current utterance buffer for real-time display
                         session_state.streaming.current_utterance_buffer = utterance
@@ -112,39 +123,96 @@ class StreamingAudioService:
                     # Enhanced error handling from your service
                     cancellation = evt.result.cancellation_details
                     error_msg = f"Recognition Canceled: {cancellation.reason} - {cancellation.error_details}"
-                    logging.error(f"[{session_state.streaming.webrtc_id}] {error_msg}")
+                    logger.error("[%s] %s", session_state.streaming.webrtc_id, error_msg)
                     session_state.streaming.last_error = cancellation.error_details
                     session_state.streaming.is_recording = False
                     
                 elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-                    logging.warning(f"[{session_state.streaming.webrtc_id}] No speech could be recognized")
+                    logger.warning("[%s] No speech could be recognized", session_state.streaming.webrtc_id)
 
             def on_recognizing(evt: speechsdk.SpeechRecognitionEventArgs):
                 """Handle partial recognition updates (POC functionality)"""
                 session_state.streaming.current_utterance_buffer = evt.result.text
-                logging.debug(f"[{session_state.streaming.webrtc_id}] Partial: '{evt.result.text}'")
+                logger.debug("[%s] Partial: '%s'", session_state.streaming.webrtc_id, evt.result.text)
 
             # Connect event handlers
             recognizer.recognized.connect(on_recognized)
             recognizer.recognizing.connect(on_recognizing)
             
+            # Signalled once Azure has finalized the session (or cancelled it)
+            session_stopped = session_state.streaming.session_stopped
+            session_stopped.clear()
+            recognizer.session_stopped.connect(lambda evt: session_stopped.set())
+            recognizer.canceled.connect(lambda evt: session_stopped.set())
+            
             # Store components in session state
             session_state.streaming.push_stream = push_stream
             session_state.streaming.recognizer = recognizer
 
-            logging.info(f"[{session_state.streaming.webrtc_id}] Azure recognizer setup successful")
+            logger.info("[%s] Azure recognizer setup successful", session_state.streaming.webrtc_id)
             return True
             
         except Exception as e:
-            logging.error(f"[{session_state.streaming.webrtc_id}] Failed to setup Azure recognizer: {e}")
+            logger.error("[%s] Failed to setup Azure recognizer: %s", session_state.streaming.webrtc_id, e)
             session_state.streaming.last_error = str(e)
             return False
 
+    def _build_recognizer(self) -> Tuple[speechsdk.audio.PushAudioInputStream, speechsdk.SpeechRecognizer]:
+        """Create a push stream + recognizer with pronunciation assessment attached"""
+        push_stream = speechsdk.audio.PushAudioInputStream()
+        audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+        recognizer = speechsdk.SpeechRecognizer(
+            speech_config=self.speech_config, # type: ignore
+            audio_config=audio_config
+        )
+        # Attach the shared pronunciation assessment config (built once in __init__)
+        self.pronunciation_config.apply_to(recognizer)
+        return push_stream, recognizer
+
+    def _refill_recognizer_pool(self):
+        """
+        Top the pool up with recognizers whose service connection is already open,
+        so start_continuous_recognition skips the WebSocket/TLS handshake.
+        A recognizer is bound to its push stream, which is closed at the end of a
+        session, so pooled recognizers are single-use and never returned.
+        """
+        while not self._recognizer_pool.full():
+            try:
+                push_stream, recognizer = self._build_recognizer()
+                speechsdk.Connection.from_recognizer(recognizer).open(True)
+                self._recognizer_pool.put_nowait((push_stream, recognizer))
+            except queue.Full:
+                break
+            except Exception as e:
+                logger.warning("Could not pre-build Azure recognizer: %s", e)
+                break
+
+    def _take_recognizer(self) -> Tuple[speechsdk.audio.PushAudioInputStream, speechsdk.SpeechRecognizer]:
+        """Take a warm recognizer from the pool, or build one if the pool is empty"""
+        try:
+            pair = self._recognizer_pool.get_nowait()
+            logger.info("Using pre-connected Azure recognizer from pool")
+        except queue.Empty:
+            pair = self._build_recognizer()
+        self._pool_executor.submit(self._refill_recognizer_pool)
+        return pair
+
+    def _store_fragment(self, session_state: StreamingSessionState, json_result: str):
+        """Parse one recognition result and append it to the session's fragments (fragment worker)"""
+        try:
+            pronunciation_data = orjson.loads(json_result)
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON result: %s", e)
+            return
+        with session_state.streaming.fragments_lock:
+            session_state.streaming.session_transcript_fragments.append(pronunciation_data)
+        logger.debug("[%s] Pronunciation data extracted and stored", session_state.streaming.webrtc_id)
+
     def start_recording(self, session_state: StreamingSessionState) -> Tuple[bool, str]:
         """
         Start recording with enhanced retry logic and resource management
         """
-        start_time = time.time()
+        start_time = time.monotonic()
         session_state.streaming.retry_count = 0
         
         for attempt in range(session_state.streaming.max_retries + 1):
@@ -152,40 +220,42 @@ class StreamingAudioService:
                 # Setup recognizer with enhanced configuration
                 if self.setup_azure_recognizer(session_state):
                     # Start Azure recognition
-                    api_start = time.time()
-                    logging.info(f"API: Azure.start_continuous_recognition | status=starting")
+                    api_start = time.monotonic()
+                    logger.info("API: Azure.start_continuous_recognition | status=starting")
                     session_state.streaming.recognizer.start_continuous_recognition() # type: ignore
-                    api_duration = time.time() - api_start
-                    logging.info(f"API: Azure.start_continuous_recognition | status=success | duration={api_duration:.2f}s")
+                    api_duration = time.monotonic() - api_start
+                    logger.info("API: Azure.start_continuous_recognition | status=success | duration=%.2fs", api_duration)
                     
-                    logging.info(f"STATE: is_recording changed from False to True")
+                    logger.info("STATE: is_recording changed from False to True")
                     session_state.streaming.is_recording = True
-                    logging.info(f"STATE: is_active changed from False to True")
+                    logger.info("STATE: is_active changed from False to True")
                     session_state.streaming.is_active = True
                     # Initialize session timing and counters (from your service)
-                    session_state.streaming.recording_start_time = time.time()
+                    session_state.streaming.recording_start_time = time.monotonic()
                     session_state.streaming.audio_chunks_processed = 0
+                    session_state.streaming.dropped_frames = 0
                     
                     # Reset session data for new utterance
                     session_state.streaming.session_transcript_fragments = []
                     session_state.streaming.current_utterance_buffer = ""
                     session_state.streaming.final_pronunciation_json = None
-                    session_state.streaming.audio_buffer = []
+                    session_state.streaming.audio_buffer = bytearray()
                     session_state.streaming.last_error = None
-                    session_state.streaming.audio_queue = asyncio.Queue() 
+                    session_state.streaming.audio_queue = deque()
+                    session_state.streaming.audio_ready.clear()
                     
                     # Start enhanced audio consumer thread
                     self._start_consumer_thread(session_state)
 
-                    elapsed = time.time() - start_time
-                    logging.info(f"[{session_state.streaming.webrtc_id}] Recording started (attempt {attempt + 1})")
-                    logging.info(f"TIMING: start_recording completed in {elapsed:.2f}s")
+                    elapsed = time.monotonic() - start_time
+                    logger.info("[%s] Recording started (attempt %s)", session_state.streaming.webrtc_id, attempt + 1)
+                    logger.info("TIMING: start_recording completed in %.2fs", elapsed)
                     return True, "Recording started..."
                 
             except Exception as e:
                 session_state.streaming.retry_count += 1
                 error_msg = f"Recording start attempt {attempt + 1} failed: {e}"
-                logging.warning(f"[{session_state.streaming.webrtc_id}] {error_msg}")
+                logger.warning("[%s] %s", session_state.streaming.webrtc_id, error_msg)
                 session_state.streaming.last_error = str(e)
                 
                 if attempt < session_state.streaming.max_retries:
@@ -199,91 +269,113 @@ class StreamingAudioService:
             
         return False, final_error
 
-    def stop_recording(self, session_state: StreamingSessionState) -> Tuple[bool, str, Optional[AzurePronunciationReport]]:
+    async def stop_recording(self, session_state: StreamingSessionState) -> Tuple[bool, str, Optional[AzurePronunciationReport]]:
         """
-        Stop recording and consolidate results using enhanced fragment processing
+        Stop recording and consolidate results using enhanced fragment processing.
+        The blocking Azure shutdown and the fragment consolidation run in worker
+        threads, with resource cleanup overlapping the consolidation.
         """
-        start_time = time.time()
+        start_time = time.monotonic()
+        cleaned_up = False
         try:
             if not session_state.streaming.is_recording:
-                logging.warning(f"[{session_state.streaming.webrtc_id}] Stop called but not recording")
+                logger.warning("[%s] Stop called but not recording", session_state.streaming.webrtc_id)
                 return False, "Not currently recording", None
                 
-            # Flush remaining audio buffer (POC logic)
-            self._flush_audio_buffer(session_state)
+            await asyncio.to_thread(self._finish_recognition, session_state)
             
-            # Give Azure a moment to process final audio
-            time.sleep(0.5)
-            logging.info("[stop_recording ] waiting 500ms for final processing")
-            
-            # Stop Azure recognition and cleanup (your service's approach)
-            if session_state.streaming.recognizer:
-                api_start = time.time()
-                logging.info(f"API: Azure.stop_continuous_recognition | status=starting")
-                session_state.streaming.recognizer.stop_continuous_recognition()
-                api_duration = time.time() - api_start
-                logging.info(f"API: Azure.stop_continuous_recognition | status=success | duration={api_duration:.2f}s")
-            
-            logging.info(f"STATE: is_recording changed from True to False")
+            logger.info("STATE: is_recording changed from True to False")
             session_state.streaming.is_recording = False
             
-            # Enhanced fragment consolidation from your service
-            pronunciation_report = self._consolidate_results(session_state)
+            # Enhanced fragment consolidation from your service; the fragments are
+            # snapshotted under the lock, so cleanup can run alongside it
+            pronunciation_report, _ = await asyncio.gather(
+                asyncio.to_thread(self._consolidate_results, session_state),
+                asyncio.to_thread(session_state.cleanup_streaming_resources),
+            )
+            cleaned_up = True
             
             if pronunciation_report:
                 # Build transcript from validated pronunciation report
                 final_transcript = pronunciation_report.display_text
-                logging.info(f"[{session_state.streaming.webrtc_id}] Session finalized: '{final_transcript}'")
-                elapsed = time.time() - start_time
-                logging.info(f"TIMING: stop_recording completed in {elapsed:.2f}s")
+                logger.info("[%s] Session finalized: '%s'", session_state.streaming.webrtc_id, final_transcript)
+                elapsed = time.monotonic() - start_time
+                logger.info("TIMING: stop_recording completed in %.2fs", elapsed)
                 return True, final_transcript, pronunciation_report
             else:
                 # Fallback to partial results if available
                 partial_transcript = session_state.streaming.current_utterance_buffer or "(No speech detected)"
-                logging.warning(f"[{session_state.streaming.webrtc_id}] No validated results, using partial: '{partial_transcript}'")
-                elapsed = time.time() - start_time
-                logging.info(f"TIMING: stop_recording completed in {elapsed:.2f}s")
+                logger.warning("[%s] No validated results, using partial: '%s'", session_state.streaming.webrtc_id, partial_transcript)
+                elapsed = time.monotonic() - start_time
+                logger.info("TIMING: stop_recording completed in %.2fs", elapsed)
                 return False, partial_transcript, None
                 
         except Exception as e:
             error_msg = f"Failed to stop recording: {e}"
-            logging.error(f"[{session_state.streaming.webrtc_id}] {error_msg}")
+            logger.error("[%s] %s", session_state.streaming.webrtc_id, error_msg)
             session_state.streaming.last_error = str(e)
             return False, error_msg, None
         finally:
             # Always cleanup resources
-            session_state.cleanup_streaming_resources()
+            if not cleaned_up:
+                await asyncio.to_thread(session_state.cleanup_streaming_resources)
             # ADD: Signal that session can be removed
-            # logging.info(f"STATE: is_active changed from True to False")
+            # logger.info("STATE: is_active changed from True to False")
             session_state.streaming.is_active = False
 
+    def _finish_recognition(self, session_state: StreamingSessionState):
+        """
+        Flushes buffered audio, stops Azure recognition and waits until every
+        recognized fragment has been parsed. Blocking; run it in a worker thread.
+        """
+        # Flush remaining audio buffer (POC logic)
+        self._flush_audio_buffer(session_state)
+        
+        # Stop Azure recognition and cleanup (your service's approach)
+        if session_state.streaming.recognizer:
+            api_start = time.monotonic()
+            logger.info("API: Azure.stop_continuous_recognition | status=starting")
+            session_state.streaming.recognizer.stop_continuous_recognition()
+            # Wait for Azure to finalize the last audio instead of sleeping blind
+            if not session_state.streaming.session_stopped.wait(timeout=2.0):
+                logger.warning("[%s] session_stopped not received within 2s", session_state.streaming.webrtc_id)
+            api_duration = time.monotonic() - api_start
+            logger.info("API: Azure.stop_continuous_recognition | status=success | duration=%.2fs", api_duration)
+        
+        # Barrier: wait for the fragment worker to finish parsing any results
+        # delivered before recognition stopped
+        self._fragment_executor.submit(lambda: None).result(timeout=5.0)
+
     def _consolidate_results(self, session_state: StreamingSessionState) -> Optional[AzurePronunciationReport]:
         """
         Smart consolidation of recognition fragments using your service's logic
         """
-        start_time = time.time()
-        fragments = session_state.streaming.session_transcript_fragments
+        start_time = time.monotonic()
+        with session_state.streaming.fragments_lock:
+            fragments = list(session_state.streaming.session_transcript_fragments)
         if not fragments:
-            logging.warning(f"[{session_state.streaming.webrtc_id}] No speech fragments to consolidate")
+            logger.warning("[%s] No speech fragments to consolidate", session_state.streaming.webrtc_id)
             return None
 
         try:
+            # Fast path: a single fragment (typical for short utterances) is already
+            # the complete report, so there is nothing to merge or copy
+            if len(fragments) == 1:
+                validated_report = AzurePronunciationReport.model_validate(fragments[0])
+                elapsed = time.monotonic() - start_time
+                logger.info("TIMING: _consolidate_results completed in %.2fs (single fragment)", elapsed)
+                return validated_report
+
             # Build complete transcript from all fragments
-            complete_utterance_parts = []
-            all_words = []
-            total_duration = 0
+            complete_utterance_parts = [f["DisplayText"].strip() for f in fragments if "DisplayText" in f]
             
-            for fragment in fragments:
-                if "DisplayText" in fragment:
-                    complete_utterance_parts.append(fragment["DisplayText"].strip())
-                
-                # Accumulate duration
-                total_duration += fragment.get("Duration", 0)
-                
-                # Collect ALL words with their pronunciation data
-                if "NBest" in fragment and fragment["NBest"]:
-                    fragment_words = fragment["NBest"][0].get("Words", [])
-                    all_words.extend(fragment_words)
+            # Accumulate duration
+            total_duration = sum(f.get("Duration", 0) for f in fragments)
+            
+            # Collect ALL words with their pronunciation data, built in one list
+            all_words = list(chain.from_iterable(
+                f["NBest"][0].get("Words", ()) for f in fragments if f.get("NBest")
+            ))
             
             # Build complete transcript
             complete_transcript = " ".join(complete_utterance_parts)
@@ -293,65 +385,58 @@ class StreamingAudioService:
             final_fragment["DisplayText"] = complete_transcript
             final_fragment["Duration"] = total_duration
             
-            # Update NBest with consolidated data
-            if "NBest" in final_fragment and final_fragment["NBest"]:
-                final_fragment["NBest"][0]["Words"] = all_words
-                final_fragment["NBest"][0]["Lexical"] = complete_transcript
-                final_fragment["NBest"][0]["Display"] = complete_transcript
-                final_fragment["NBest"][0]["ITN"] = complete_transcript
-                final_fragment["NBest"][0]["MaskedITN"] = complete_transcript
+            # Update NBest with consolidated data. NBestResult only reads Display
+            # (Lexical/ITN/MaskedITN are not part of the model), and a fresh dict
+            # keeps the stored first fragment untouched.
+            if final_fragment.get("NBest"):
+                final_fragment["NBest"] = [
+                    {**final_fragment["NBest"][0], "Words": all_words, "Display": complete_transcript}
+                ]
                 
                 # Keep the original PronunciationAssessment from first fragment
                 # Individual word/phoneme scores are preserved in the Words array
             
-            # Validate with Pydantic
-            final_json_string = json.dumps(final_fragment)
-            validated_report = AzurePronunciationReport.model_validate_json(final_json_string)
-
-            elapsed = time.time() - start_time
-            logging.info(f"[{session_state.streaming.webrtc_id}] Successfully consolidated {len(fragments)} fragments with {len(all_words)} total words")
-            logging.info(f"METRICS: fragments_consolidated={len(fragments)} total_words={len(all_words)} (context: consolidation)")
-            logging.info(f"TIMING: _consolidate_results completed in {elapsed:.2f}s")
+            # Validate with Pydantic straight from the dict (no JSON string round trip)
+            validated_report = AzurePronunciationReport.model_validate(final_fragment)
+
+            elapsed = time.monotonic() - start_time
+            logger.info("[%s] Successfully consolidated %s fragments with %s total words", session_state.streaming.webrtc_id, len(fragments), len(all_words))
+            logger.info("METRICS: fragments_consolidated=%s total_words=%s (context: consolidation)", len(fragments), len(all_words))
+            logger.info("TIMING: _consolidate_results completed in %.2fs", elapsed)
             return validated_report
 
         except ValidationError as e:
-            logging.error(f"[{session_state.streaming.webrtc_id}] Pydantic validation failed: {e}")
+            logger.error("[%s] Pydantic validation failed: %s", session_state.streaming.webrtc_id, e)
             return None
         except Exception as e:
-            logging.error(f"[{session_state.streaming.webrtc_id}] Unexpected error during consolidation: {e}")
+            logger.error("[%s] Unexpected error during consolidation: %s", session_state.streaming.webrtc_id, e)
             return None
 
     def _flush_audio_buffer(self, session_state: StreamingSessionState):
         """Flush any remaining audio in buffer (POC logic)"""
-        if (session_state.streaming.audio_buffer and 
-            len(session_state.streaming.audio_buffer) > 0 and 
-            session_state.streaming.push_stream):
-            
-            chunk = np.array(session_state.streaming.audio_buffer)
-            pcm = chunk.astype(np.int16).tobytes()
-            session_state.streaming.push_stream.write(pcm)
-            session_state.streaming.audio_buffer = []
-            logging.debug(f"[{session_state.streaming.webrtc_id}] Flushed {len(chunk)} remaining samples")
+        residual = session_state.streaming.audio_buffer
+        if residual and session_state.streaming.push_stream:
+            session_state.streaming.push_stream.write(bytes(residual))
+            logger.debug("[%s] Flushed %s remaining samples", session_state.streaming.webrtc_id, len(residual) // 2)
+            residual.clear()
 
     def _start_consumer_thread(self, session_state: StreamingSessionState):
         """Start enhanced audio consumer thread with resource management"""
         def consumer_target():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
             try:
-                loop.run_until_complete(self._consume_audio_loop(session_state))
+                self._consume_audio_loop(session_state)
             except Exception as e:
-                logging.error(f"[{session_state.streaming.webrtc_id}] Consumer thread error: {e}")
-            finally:
-                loop.close()
+                logger.error("[%s] Consumer thread error: %s", session_state.streaming.webrtc_id, e)
         
         thread = threading.Thread(target=consumer_target, daemon=True)
         thread.start()
-        logging.info(f"🧵 [{session_state.streaming.webrtc_id}] Enhanced consumer thread started")
+        logger.info("🧵 [%s] Enhanced consumer thread started", session_state.streaming.webrtc_id)
 
-    async def _consume_audio_loop(self, session_state: StreamingSessionState):
+    def _consume_audio_loop(self, session_state: StreamingSessionState):
         """
-        OPTIMIZED audio consumer with batching and async processing
+        OPTIMIZED audio consumer with batching, run directly on the consumer thread.
+        The producer hands chunks over through a deque + Event, so no event loop
+        is needed and push_stream.write is called inline (this thread is the executor).
         
         KEY CHANGES:
         1. Increased chunk size from 30ms → 200ms (reduces API overhead)
@@ -359,16 +444,19 @@ class StreamingAudioService:
         3. Implemented queue pressure relief to prevent backing up
         4. Added performance monitoring and adaptive processing
         """
-        start_time = time.time()
-        logging.info(f"[{session_state.streaming.webrtc_id}] Starting OPTIMIZED audio consumer")
+        # Hoisted once: the loop below reads these attributes 10-20x per second.
+        # Flags flipped by other threads (is_recording, ...) are still read live.
+        streaming = session_state.streaming
+        start_time = time.monotonic()
+        logger.info("[%s] Starting OPTIMIZED audio consumer", streaming.webrtc_id)
         
         # CHANGE 1: Larger chunk size for better Azure performance
-        target_samples = int(16000 * 0.5)  # 200ms chunks - optimal for Azure
+        target_bytes = int(16000 * 0.5) * 2  # 200ms chunks of PCM16 - optimal for Azure
         
         # CHANGE 2: Add batching variables
         batch_buffer = []
-        max_batch_size = 8  # Process up to 5 chunks at once
-        last_process_time = time.time()
+        max_batch_size = 8  # Recomputed below from the measured Azure write latency
+        last_process_time = time.monotonic()
         batch_timeout = 0.1  # 100ms max wait for batching
         
         # CHANGE 3: Performance monitoring
@@ -381,49 +469,43 @@ class StreamingAudioService:
         }
         
         try:
-            logging.info(f"[{session_state.streaming.webrtc_id}] Consumer starting: recording={session_state.streaming.is_recording}, active={session_state.streaming.is_active}")
+            logger.info("[%s] Consumer starting: recording=%s, active=%s", streaming.webrtc_id, streaming.is_recording, streaming.is_active)
             
-            while session_state.streaming.is_active and session_state.streaming.is_recording:
+            while streaming.is_active and streaming.is_recording:
                 try:
                     # CHANGE 4: Enhanced timeout and resource checks
-                    current_time = time.time()
-                    if (session_state.streaming.recording_start_time and 
-                        current_time - session_state.streaming.recording_start_time > session_state.streaming.max_recording_seconds):
-                        logging.warning(f"[{session_state.streaming.webrtc_id}] Recording time limit reached")
-                        session_state.streaming.is_recording = False
+                    current_time = time.monotonic()
+                    if (streaming.recording_start_time and 
+                        current_time - streaming.recording_start_time > streaming.max_recording_seconds):
+                        logger.warning("[%s] Recording time limit reached", streaming.webrtc_id)
+                        streaming.is_recording = False
                         break
                     
                     # CHANGE 5: Queue pressure monitoring and relief
-                    queue_size = session_state.streaming.audio_queue.qsize()
+                    queue_size = len(streaming.audio_queue)
                     performance_stats['avg_queue_size'] = (performance_stats['avg_queue_size'] + queue_size) / 2
                     
                     # CRITICAL: Queue pressure relief
                     if queue_size > 20:  # Queue backing up critically
-                        # logging.warning(f"CRITICAL queue backup: {queue_size} items - applying pressure relief")
+                        # logger.warning("CRITICAL queue backup: %s items - applying pressure relief", queue_size)
                         performance_stats['queue_overflows'] += 1
                         
                         # Emergency drain: process multiple items quickly
-                        emergency_batch = []
                         drain_count = min(queue_size - 10, 15)  # Drain down to 10 items
                         
-                        for _ in range(drain_count):
-                            try:
-                                emergency_audio = session_state.streaming.audio_queue.get_nowait()
-                                emergency_batch.extend(emergency_audio)
-                                session_state.streaming.audio_queue.task_done()
-                            except asyncio.QueueEmpty:
-                                break
+                        # Single bulk dequeue: this thread is the only consumer, so the
+                        # deque holds at least queue_size items and popleft can't run dry
+                        emergency_batch = [streaming.audio_queue.popleft() for _ in range(drain_count)]
                         
                         # Process emergency batch immediately
                         if emergency_batch:
-                            session_state.streaming.audio_buffer.extend(emergency_batch)
-                            await self._process_audio_buffer_optimized(session_state, target_samples, force_flush=True)
-                            # logging.info(f"Emergency processed {len(emergency_batch)} samples from {drain_count} chunks")
+                            self._process_audio_buffer_optimized(session_state, emergency_batch, target_bytes, force_flush=True)
+                            # logger.info("Emergency processed %s samples from %s chunks", len(emergency_batch), drain_count)
                         continue
                     
                     elif queue_size > 10:  # Moderate backup - warn but continue
                         # if queue_warnings % 20 == 0:  # Throttled warning
-                            # logging.warning(f"Audio queue backing up: {queue_size} items (warning #{queue_warnings + 1})")
+                            # logger.warning("Audio queue backing up: %s items (warning #%s)", queue_size, queue_warnings + 1)
                         queue_warnings += 1
                     
                     # CHANGE 6: Adaptive timeout based on queue pressure
@@ -436,156 +518,137 @@ class StreamingAudioService:
                         timeout = 0.5   # 500ms - relaxed when queue is empty
                     
                     # Wait for audio data with adaptive timeout
-                    try:
-                        audio_data = await asyncio.wait_for(
-                            session_state.streaming.audio_queue.get(), 
-                            timeout=timeout
-                        )
-                        
-                        # CHANGE 7: Batch processing logic
-                        batch_buffer.append(audio_data)
-                        session_state.streaming.audio_queue.task_done()
-                        
-                        # Process batch when:
-                        # - Batch is full, OR
-                        # - Queue is backing up (>5 items), OR  
-                        # - Timeout reached (100ms since last process)
-                        should_process = (
-                            len(batch_buffer) >= max_batch_size or
-                            queue_size > 5 or
-                            (current_time - last_process_time) > batch_timeout
-                        )
-                        
-                        if should_process and session_state.streaming.is_recording:
-                            # CHANGE 8: Process entire batch at once
-                            batch_audio = []
-                            for audio_chunk in batch_buffer:
-                                batch_audio.extend(audio_chunk)
-                            
-                            session_state.streaming.audio_buffer.extend(batch_audio)
-                            await self._process_audio_buffer_optimized(session_state, target_samples)
-                            
-                            # Update stats
-                            performance_stats['chunks_processed'] += len(batch_buffer)
-                            performance_stats['batches_sent'] += 1
-                            
-                            # Reset batch
-                            batch_buffer.clear()
-                            last_process_time = current_time
-                            
-                            # Log performance periodically
-                            if performance_stats['batches_sent'] % 50 == 0:
-                                avg_queue = performance_stats['avg_queue_size']
-                                logging.info(f"Performance: {performance_stats['batches_sent']} batches, "
-                                        f"avg queue: {avg_queue:.1f}, overflows: {performance_stats['queue_overflows']}")
-                    
-                    except asyncio.TimeoutError:
+                    audio_data = streaming.get_audio(timeout)
+                    if audio_data is None:
                         # CHANGE 9: Process any pending batch on timeout
-                        if batch_buffer and session_state.streaming.is_recording:
-                            batch_audio = []
-                            for audio_chunk in batch_buffer:
-                                batch_audio.extend(audio_chunk)
-                            
-                            session_state.streaming.audio_buffer.extend(batch_audio)
-                            await self._process_audio_buffer_optimized(session_state, target_samples)
+                        if batch_buffer and streaming.is_recording:
+                            self._process_audio_buffer_optimized(session_state, batch_buffer, target_bytes)
                             
                             batch_buffer.clear()
                             last_process_time = current_time
                             performance_stats['batches_sent'] += 1
                         continue
+                    
+                    # CHANGE 7: Batch processing logic
+                    batch_buffer.append(audio_data)
+                    
+                    # Adaptive batch size: fast writes -> bigger, fewer batches;
+                    # slow writes (Azure backpressure) -> smaller batches, sooner
+                    write_ema = streaming.write_latency_ema
+                    max_batch_size = min(16, max(2, round(0.2 / max(write_ema, 0.01))))
+                    
+                    # Process batch when:
+                    # - Batch is full, OR
+                    # - Queue is backing up (>5 items), OR  
+                    # - Timeout reached (100ms since last process)
+                    should_process = (
+                        len(batch_buffer) >= max_batch_size or
+                        queue_size > 5 or
+                        (current_time - last_process_time) > batch_timeout
+                    )
+                    
+                    if should_process and streaming.is_recording:
+                        # CHANGE 8: Process entire batch at once
+                        self._process_audio_buffer_optimized(session_state, batch_buffer, target_bytes)
+                        
+                        # Update stats
+                        performance_stats['chunks_processed'] += len(batch_buffer)
+                        performance_stats['batches_sent'] += 1
+                        
+                        # Reset batch
+                        batch_buffer.clear()
+                        last_process_time = current_time
+                        
+                        # Log performance periodically
+                        if performance_stats['batches_sent'] % 50 == 0:
+                            avg_queue = performance_stats['avg_queue_size']
+                            logger.info("Performance: %d batches, avg queue: %.1f, overflows: %d, "
+                                        "write EMA: %.1fms, batch size: %d",
+                                        performance_stats['batches_sent'], avg_queue, performance_stats['queue_overflows'],
+                                        streaming.write_latency_ema * 1000, max_batch_size)
                         
                 except Exception as e:
-                    logging.error(f"[{session_state.streaming.webrtc_id}] Error in audio consumer: {e}")
+                    logger.error("[%s] Error in audio consumer: %s", streaming.webrtc_id, e)
                     break
                     
         except Exception as e:
-            logging.error(f"[{session_state.streaming.webrtc_id}] Fatal error in consumer loop: {e}")
+            logger.error("[%s] Fatal error in consumer loop: %s", streaming.webrtc_id, e)
         finally:
             # Process any final batch
             if batch_buffer:
                 try:
-                    final_audio = []
-                    for audio_chunk in batch_buffer:
-                        final_audio.extend(audio_chunk)
-                    session_state.streaming.audio_buffer.extend(final_audio)
-                    await self._process_audio_buffer_optimized(session_state, target_samples, force_flush=True)
+                    self._process_audio_buffer_optimized(session_state, batch_buffer, target_bytes, force_flush=True)
                 except Exception as e:
-                    logging.error(f"Error processing final batch: {e}")
+                    logger.error("Error processing final batch: %s", e)
 
-            elapsed = time.time() - start_time
-            logging.info(f"[{session_state.streaming.webrtc_id}] OPTIMIZED audio consumer stopped")
-            logging.info(f"Final stats: {performance_stats}")
-            logging.info(f"TIMING: _consume_audio_loop completed in {elapsed:.2f}s")
+            elapsed = time.monotonic() - start_time
+            logger.info("[%s] OPTIMIZED audio consumer stopped", streaming.webrtc_id)
+            logger.info("Final stats: %s", performance_stats)
+            logger.info("TIMING: _consume_audio_loop completed in %.2fs", elapsed)
 
     # CHANGE 10: Add new optimized buffer processing method
-    async def _process_audio_buffer_optimized(self, session_state: StreamingSessionState, target_samples: int, force_flush: bool = False):
+    def _process_audio_buffer_optimized(self, session_state: StreamingSessionState, chunks: List[bytes], target_bytes: int, force_flush: bool = False):
         """
         Optimized audio buffer processing with intelligent chunking
         
         WHY THIS HELPS:
         - Processes larger chunks (200ms vs 30ms)
-        - Uses async processing to prevent blocking
-        - Implements smart buffer management
+        - Joins the queued PCM16 bytes once and writes them straight to Azure,
+          with no numpy array in between
+        - Only a sub-chunk tail is held back in the residual buffer
         """
-        if not session_state.streaming.push_stream:
+        streaming = session_state.streaming
+        if not streaming.push_stream:
             return
             
-        buffer_size = len(session_state.streaming.audio_buffer)
+        residual = streaming.audio_buffer
+        batch = b"".join([residual, *chunks]) if residual else b"".join(chunks)
+        residual.clear()
+        # The join copied the frames, so their buffers can go back to the producer
+        for chunk in chunks:
+            streaming.frame_pool.release(chunk)
         
-        # Process if we have enough samples OR force flush
-        if buffer_size >= target_samples or (force_flush and buffer_size > 0):
-            try:
-                if force_flush:
-                    # Flush everything
-                    chunk = np.array(session_state.streaming.audio_buffer)
-                    session_state.streaming.audio_buffer = []
-                else:
-                    # Process optimal chunk size
-                    chunk = np.array(session_state.streaming.audio_buffer[:target_samples])
-                    session_state.streaming.audio_buffer = session_state.streaming.audio_buffer[target_samples:]
-                
-                # CHANGE 11: Async processing to prevent blocking
-                pcm = chunk.astype(np.int16).tobytes()
+        # Send everything, or every whole target-sized chunk available, so a
+        # batch crosses into the SDK in one write instead of one per chunk
+        to_send = len(batch) if force_flush else len(batch) - len(batch) % target_bytes
+        if to_send < len(batch):
+            residual += batch[to_send:]
+        
+        try:
+            for offset in range(0, to_send, MAX_WRITE_BYTES):
+                # Split only very large backlogs, to keep single writes bounded;
+                # a full-range slice of bytes is the same object, so no copy
+                pcm = batch[offset:min(offset + MAX_WRITE_BYTES, to_send)]
                 
-                # Use asyncio to prevent blocking the consumer thread
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    None,  # Use default thread pool
-                    session_state.streaming.push_stream.write,
-                    pcm
-                )
+                # Blocking native write; this already runs on the consumer thread
+                write_start = time.perf_counter()
+                streaming.push_stream.write(pcm)
+                write_time = time.perf_counter() - write_start
+                streaming.write_latency_ema = 0.9 * streaming.write_latency_ema + 0.1 * write_time
                 
                 # Track processing for resource management
-                session_state.streaming.audio_chunks_processed += 1
+                streaming.audio_chunks_processed += 1
 
-                logging.debug(f"Processed {len(chunk)} samples "
-                            f"(chunk #{session_state.streaming.audio_chunks_processed})")
+                logger.debug("Processed %d samples (chunk #%d)",
+                             len(pcm) // 2, streaming.audio_chunks_processed)
                 
-            except Exception as e:
-                logging.error(f"Error processing audio buffer: {e}")
+        except Exception as e:
+            logger.error("Error processing audio buffer: %s", e)
 
-    def queue_audio_data(self, audio_data: List[float], session_state: StreamingSessionState):
+    def queue_audio_data(self, audio_data: Union[np.ndarray, bytes], session_state: StreamingSessionState):
         """
         Queue audio data for processing with enhanced validation
-        Used by the FastRTC handler to feed audio into the streaming pipeline
+        Used by the FastRTC handler to feed audio into the streaming pipeline.
+        Takes 16 kHz mono PCM16, either as an int16 ndarray of shape (N,) or as
+        PCM16 LE bytes. Bytes are queued as-is; arrays are copied once into a
+        pooled frame buffer (a plain memcpy for int16).
+        A full queue is the only drop signal; drops are counted and logged in batches.
         """
         if not session_state.streaming.is_recording:
             return  # Silently drop audio if not recording
             
+        streaming = session_state.streaming
         try:
-            # Monitor queue size - if it's backing up, we're losing audio
-            queue_size = session_state.streaming.audio_queue.qsize()
-            # CHANGE 13: Implement smart dropping to prevent complete backup
-            if queue_size > 50:  # Queue at maximum
-                # Drop this frame but log it
-                logging.error("Queue full - dropping frame to prevent backup")
-                return
-            elif queue_size > 30:
-                # Warn but still accept
-                logging.warning(f"Queue high: {queue_size} items")
-            session_state.streaming.audio_queue.put_nowait(audio_data)
-            logging.debug(f"Queued {len(audio_data)} samples (queue: {queue_size + 1})")
-        except asyncio.QueueFull:
-            logging.error(f"Queue full, dropping frame")
+            streaming.enqueue_pcm(audio_data)
         except Exception as e:
-            logging.error(f"[{session_state.streaming.webrtc_id}] Error queuing audio: {e}")
\ No newline at end of file
+            logger.error("[%s] Error queuing audio: %s", streaming.webrtc_id, e)
@@ -1,7 +1,23 @@
 # <-- AssemblyAI Adapter: handles all STT interaction
 import assemblyai as aai
 from config import ASSEMBLYAI_API_KEY
-import sys
+from services.io_executor import run_speech_io
+import logging
+import queue
+
+try:
+    from assemblyai.streaming.v3 import (
+        Encoding, StreamingClient, StreamingClientOptions, StreamingEvents, StreamingParameters
+    )
+    STREAMING_AVAILABLE = True
+except ImportError:
+    STREAMING_AVAILABLE = False
+
+# --- Streaming Settings ---
+STREAM_SAMPLE_RATE = 16000
+STREAM_CHUNK_BYTES = 3200  # 100 ms of 16 kHz PCM16; v3 accepts 50-1000 ms per message
+
+logger = logging.getLogger(__name__)
 
 class AssemblyAITranscriber:
     def __init__(self):
@@ -10,13 +26,13 @@ class AssemblyAITranscriber:
         """
         if not ASSEMBLYAI_API_KEY:
             # This check is crucial for clear error messages at startup.
-            print("FATAL ERROR: ASSEMBLYAI_API_KEY is not set. Please check your .env file.", file=sys.stderr)
+            logger.critical("ASSEMBLYAI_API_KEY is not set. Please check your .env file.")
             self.transcriber = None
             return
             
         aai.settings.api_key = ASSEMBLYAI_API_KEY
         self.transcriber = aai.Transcriber()
-        # print("--- AssemblyAI Transcriber Initialized Successfully ---")
+        # logger.info("--- AssemblyAI Transcriber Initialized Successfully ---")
 
     def transcribe(self, audio_file_path: str) -> str:
         """
@@ -30,7 +46,7 @@ class AssemblyAITranscriber:
             return "Error: No audio file provided."
                 
         if aai.settings.api_key is None:
-            print("CRITICAL DEBUG: aai.settings.api_key is None just before transcription!")
+            logger.critical("aai.settings.api_key is None just before transcription!")
         
         try:
             transcript = self.transcriber.transcribe(audio_file_path)
@@ -40,5 +56,88 @@ class AssemblyAITranscriber:
             else:
                 return transcript.text if transcript.text is not None else "Nothing transcribed."
         except Exception as e:
-            print(f"An unexpected error occurred during transcription: {e}", file=sys.stderr)
-            return "Error: An unexpected error occurred during transcription."
\ No newline at end of file
+            logger.error("An unexpected error occurred during transcription: %s", e)
+            return "Error: An unexpected error occurred during transcription."
+
+    async def transcribe_async(self, audio_file_path: str) -> str:
+        """
+        Transcribes the given audio file without blocking the event loop. The
+        upload and polling run on the shared speech I/O pool.
+        """
+        return await run_speech_io(self.transcribe, audio_file_path)
+
+
+class StreamingAssemblyAITranscriber:
+    """
+    Streams 16 kHz PCM16 audio to AssemblyAI's v3 Universal-Streaming WebSocket
+    while the user speaks, instead of uploading a finished file. The in-progress
+    turn is kept in `partial_transcript`; each completed, formatted turn is put
+    on the `results` queue as soon as it arrives.
+    """
+    def __init__(self):
+        self.client = None
+        self.results: "queue.Queue[str]" = queue.Queue()
+        self.partial_transcript = ""
+        self._pending = bytearray()  # Audio waiting to fill one STREAM_CHUNK_BYTES message
+
+        if not ASSEMBLYAI_API_KEY:
+            logger.critical("ASSEMBLYAI_API_KEY is not set. Please check your .env file.")
+            return
+        if not STREAMING_AVAILABLE:
+            logger.critical("assemblyai streaming v3 is not available. Upgrade the assemblyai package.")
+            return
+
+        try:
+            client = StreamingClient(
+                StreamingClientOptions(api_key=ASSEMBLYAI_API_KEY, api_host="streaming.assemblyai.com")
+            )
+            client.on(StreamingEvents.Turn, self._on_turn)
+            client.on(StreamingEvents.Error, self._on_error)
+            client.connect(
+                StreamingParameters(
+                    sample_rate=STREAM_SAMPLE_RATE,
+                    encoding=Encoding.pcm_s16le,
+                    format_turns=True,
+                )
+            )
+            self.client = client
+        except Exception as e:
+            logger.error("Error opening AssemblyAI streaming session: %s", e)
+
+    def send_audio(self, pcm_bytes: bytes):
+        """
+        Sends 16 kHz PCM16 LE audio. Frames are regrouped into ~100 ms messages,
+        since the service rejects messages shorter than 50 ms.
+        """
+        if self.client is None:
+            return
+        pending = self._pending
+        pending += pcm_bytes
+        while len(pending) >= STREAM_CHUNK_BYTES:
+            self.client.stream(bytes(pending[:STREAM_CHUNK_BYTES]))
+            del pending[:STREAM_CHUNK_BYTES]
+
+    def close(self):
+        """Sends any remaining audio and ends the session, waiting for the final turn."""
+        if self.client is None:
+            return
+        try:
+            if self._pending:
+                self.client.stream(bytes(self._pending))
+                self._pending.clear()
+            self.client.disconnect(terminate=True)
+        except Exception as e:
+            logger.error("Error closing AssemblyAI streaming session: %s", e)
+        finally:
+            self.client = None
+
+    def _on_turn(self, client, event):
+        # With format_turns=True each turn ends twice: raw, then formatted. Keep the formatted one.
+        if event.end_of_turn and event.turn_is_formatted:
+            self.results.put(event.transcript)
+            self.partial_transcript = ""
+        else:
+            self.partial_transcript = event.transcript
+
+    def _on_error(self, client, error):
+        logger.error("AssemblyAI streaming error: %s", error)
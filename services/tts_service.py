@@ -2,78 +2,239 @@
 # In: services/tts_service.py
 
 from google.cloud import texttospeech
-import sys
 import os
-import tempfile
-import uuid
+import asyncio
+import shutil
+import hashlib
+import itertools
 import time
 import logging
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Set
+from utils.text_cleaner import clean_and_split_for_speech
+from services.io_executor import run_speech_io
+
+logger = logging.getLogger(__name__)
+
+# --- Synthesized Audio Cache ---
+# Repeated prompts (part intros, canned clarifications) are served from disk
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "/tmp/tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024
+WRITE_CHUNK_BYTES = 64 * 1024
+AUDIO_EXTENSIONS = {
+    texttospeech.AudioEncoding.OGG_OPUS: ".ogg",
+    texttospeech.AudioEncoding.MP3: ".mp3",
+}
+
+# --- Sentence Streaming ---
+STREAM_PREFETCH = 2  # Sentences synthesized ahead of the one being played
+MAX_CONCURRENT_REQUESTS = 8  # Keeps bursts well inside the per-project TTS quota
 
 class GoogleTTS:
     def __init__(self):
         """
-        Initializes the Google Cloud Text-to-Speech client.
+        Initializes the Google Cloud Text-to-Speech configuration. The async
+        client itself is created on first use, inside the serving event loop,
+        because its gRPC channel is bound to the loop it was created on.
         """
+        self.client: Optional[texttospeech.TextToSpeechAsyncClient] = None
+        self._ready = False
         try:
-            self.client = texttospeech.TextToSpeechClient()
             # A natural, friendly-sounding voice
             self.voice = texttospeech.VoiceSelectionParams(
                 language_code="en-US",
                 name="en-US-Studio-O" # A high-quality WaveNet voice
             )
+            # Ogg/Opus is roughly half the size of MP3 at TTS bitrates and plays in <audio>
             self.audio_config = texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.OGG_OPUS,
+                sample_rate_hertz=24000
+            )
+            # Kept for callers that explicitly ask for an .mp3 file
+            self._mp3_config = texttospeech.AudioConfig(
                 audio_encoding=texttospeech.AudioEncoding.MP3
             )
-            print("--- Google TTS Service Initialized Successfully ---")
+            self._cache_dir = Path(TTS_CACHE_DIR)
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            self._sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            self._counter = itertools.count()  # Unique temp-file suffixes within this process
+            self._prefetch_tasks: Set[asyncio.Task] = set()  # Strong refs so pending prefetches aren't collected
+            self._ready = True
+            logger.info("--- Google TTS Service Initialized Successfully ---")
         except Exception as e:
-            print(f"FATAL ERROR: Could not initialize Google TTS. Check credentials.", file=sys.stderr)
-            print(f"Error details: {e}", file=sys.stderr)
-            self.client = None
+            logger.critical("Could not initialize Google TTS. Check credentials. Error details: %s", e)
+
+    def _get_client(self) -> Optional[texttospeech.TextToSpeechAsyncClient]:
+        """Returns the shared async client, creating it on the running loop the first time."""
+        if self.client is None and self._ready:
+            try:
+                # One grpc_asyncio channel multiplexes concurrent requests as HTTP/2 streams
+                self.client = texttospeech.TextToSpeechAsyncClient(transport="grpc_asyncio")
+            except Exception as e:
+                logger.critical("Could not create Google TTS client. Check credentials. Error details: %s", e)
+                self._ready = False
+        return self.client
 
-    def synthesize_speech(self, text: str, output_filepath: str = None) -> str:
+    async def synthesize_speech(self, text: str, output_filepath: str = None) -> str:
         """
         Synthesizes speech from text and saves it to a file.
 
         Args:
             text: The text to synthesize.
-            output_filepath: The path to save the MP3 file.
+            output_filepath: The path to save the audio file. Ogg/Opus unless the
+                path ends in .mp3, in which case MP3 is requested.
 
         Returns:
             The path to the created audio file, or None if an error occurred.
         """
-        if not self.client:
+        # Nothing to say (e.g. a reply that was only Markdown); skip the round-trip
+        if not text or not text.strip():
+            logger.debug("API: GoogleTTS.synthesize_speech | status=skipped_empty")
+            return None
+
+        client = self._get_client()
+        if not client:
             return None
 
         char_count = len(text)
         start_time = time.time()
         try:
-            logging.info(f"API: GoogleTTS.synthesize_speech | status=starting | chars={char_count}")
-            # If no output path specified, create a unique temp file
-            if output_filepath is None:
-                # Create unique filename in /tmp directory
-                unique_id = str(uuid.uuid4())[:8]
-                output_filepath = f"/tmp/tts_output_{unique_id}.mp3"
-            
             # Ensure we're writing to /tmp if no full path given
-            if not output_filepath.startswith('/'):
+            if output_filepath is not None and not output_filepath.startswith('/'):
                 filename = os.path.basename(output_filepath)
                 output_filepath = f"/tmp/{filename}"
-            
+
+            audio_config = self.audio_config
+            if output_filepath is not None and output_filepath.endswith(".mp3"):
+                audio_config = self._mp3_config
+
+            cached = self._cache_path(text, audio_config)
+            if cached.exists():
+                logger.info("API: GoogleTTS.synthesize_speech | status=cache_hit | chars=%d", char_count)
+                os.utime(cached)  # Refresh mtime so eviction treats it as recently used
+                if output_filepath is None:
+                    return str(cached)
+                await run_speech_io(shutil.copyfile, cached, output_filepath)
+                return output_filepath
+
+            logger.info("API: GoogleTTS.synthesize_speech | status=starting | chars=%d", char_count)
             synthesis_input = texttospeech.SynthesisInput(text=text)
-            response = self.client.synthesize_speech(
-                input=synthesis_input, voice=self.voice, audio_config=self.audio_config
+            response = await client.synthesize_speech(
+                input=synthesis_input, voice=self.voice, audio_config=audio_config
             )
             
-            with open(output_filepath, "wb") as out:
-                out.write(response.audio_content)
+            # Disk I/O runs off the event loop, on the shared speech I/O pool
+            await run_speech_io(self._store_in_cache, cached, response.audio_content)
+
+            if output_filepath is None:
+                output_filepath = str(cached)
+            else:
+                await run_speech_io(shutil.copyfile, cached, output_filepath)
             
             elapsed = time.time() - start_time
-            logging.info(f"API: GoogleTTS.synthesize_speech | status=success | duration={elapsed:.2f}s | chars={char_count}")
-            print(f"✅ TTS audio saved to: {output_filepath}")
+            logger.info("API: GoogleTTS.synthesize_speech | status=success | duration=%.2fs | chars=%d", elapsed, char_count)
+            logger.debug("TTS audio saved to: %s", output_filepath)
             return output_filepath
             
         except Exception as e:
             elapsed = time.time() - start_time
-            logging.error(f"API: GoogleTTS.synthesize_speech | status=error | duration={elapsed:.2f}s | chars={char_count} | error={str(e)}")
-            print(f"Error during speech synthesis: {e}", file=sys.stderr)
-            return None
\ No newline at end of file
+            logger.error("API: GoogleTTS.synthesize_speech | status=error | duration=%.2fs | chars=%d | error=%s", elapsed, char_count, e)
+            return None
+
+    async def synthesize_many(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Synthesizes several texts concurrently, at most MAX_CONCURRENT_REQUESTS
+        at a time. Returns the audio paths in input order (None where one failed).
+        """
+        async def _one(text: str) -> Optional[str]:
+            if not text or not text.strip():
+                return None  # Don't hold a semaphore slot for nothing
+            async with self._sem:
+                return await self.synthesize_speech(text)
+
+        return await asyncio.gather(*[_one(text) for text in texts])
+
+    def prefetch(self, text: str):
+        """
+        Warms the disk cache for a prompt that is known to be spoken next (e.g.
+        the next part's intro while the user is still answering), so the real
+        synthesize_speech call is a cache hit. Must be called from the event
+        loop; synthesis runs as a background task and failures are only logged.
+        """
+        if not text or not text.strip() or not self._ready:
+            return
+        task = asyncio.get_running_loop().create_task(self.synthesize_speech(text))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def synthesize_speech_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        Synthesizes speech one sentence at a time, yielding each sentence's audio file
+        path as soon as it is ready. The next sentences are requested in the
+        background while the current one plays, so time-to-first-audio depends
+        on the first sentence only. Sentences that fail to synthesize are skipped.
+        """
+        if not self._get_client():
+            return
+
+        sentences = [s for s in clean_and_split_for_speech(text) if s.strip()]
+        tasks = [
+            asyncio.create_task(self.synthesize_speech(sentence))
+            for sentence in sentences[:STREAM_PREFETCH]
+        ]
+        try:
+            for i in range(len(sentences)):
+                # Keep the prefetch window full before waiting on the current sentence
+                if i + STREAM_PREFETCH < len(sentences):
+                    tasks.append(asyncio.create_task(self.synthesize_speech(sentences[i + STREAM_PREFETCH])))
+                audio_path = await tasks[i]
+                if audio_path:
+                    yield audio_path
+        finally:
+            # The consumer may stop early; don't leave prefetches running
+            for task in tasks:
+                task.cancel()
+
+    def _cache_path(self, text: str, audio_config: texttospeech.AudioConfig) -> Path:
+        """Returns the cache file for this text under the current voice and the given encoding."""
+        key = hashlib.blake2b(
+            f"{self.voice.name}|{audio_config.audio_encoding}|{audio_config.sample_rate_hertz}|{text}".encode(),
+            digest_size=16
+        ).hexdigest()
+        return self._cache_dir / f"{key}{AUDIO_EXTENSIONS[audio_config.audio_encoding]}"
+
+    def _store_in_cache(self, cached: Path, audio_content: bytes):
+        """Writes audio to a temp name and renames it, so readers never see a partial file."""
+        tmp_path = cached.with_name(f"{cached.name}.{os.getpid()}_{next(self._counter)}.tmp")
+        # Unbuffered writes straight from a view of the response bytes: no file
+        # object, no intermediate buffer copy
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(audio_content)
+            while view:
+                written = os.write(fd, view[:WRITE_CHUNK_BYTES])
+                view = view[written:]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, cached)
+        self._evict_cache()
+
+    def _evict_cache(self):
+        """Deletes least recently used files until the cache fits in TTS_CACHE_MAX_BYTES."""
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in os.scandir(self._cache_dir)
+                if entry.is_file() and entry.name.endswith(tuple(AUDIO_EXTENSIONS.values()))
+            ]
+            total = sum(size for _, size, _ in entries)
+            if total <= TTS_CACHE_MAX_BYTES:
+                return
+            for _, size, path in sorted(entries):
+                os.remove(path)
+                total -= size
+                if total <= TTS_CACHE_MAX_BYTES:
+                    break
+            logger.info("TTS cache evicted down to %.1f MB", total / (1024 * 1024))
+        except OSError as e:
+            logger.warning("TTS cache eviction failed: %s", e)
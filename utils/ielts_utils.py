@@ -1,39 +1,122 @@
+import weakref
 from logic.ielts_models import IELTSFeedback, IELTSFinalReport 
 
-def format_feedback_for_display(report: IELTSFeedback) -> str:
-    """Converts an IELTSFeedback object into a readable Markdown string."""
-    
-    # If we got a valid Pydantic object, format it into a nice Markdown report
-    summary = report.overall_summary
-    details = report.detailed_feedback
-    # Using an f-string with triple quotes for a clean, multi-line template.
-    display_text = f"""
+# --- Display Templates ---
+# Parsed once at import; the leading indentation is part of the rendered output.
+_FEEDBACK_TEMPLATE = """
         ## Overall Summary
-        - **Part Assessed:** {summary.part_assessed}
-        - **Positive Highlight:** {summary.positive_highlight}
-        - **Key Area for Improvement:** {summary.key_improvement_area}
+        - **Part Assessed:** {part_assessed}
+        - **Positive Highlight:** {positive_highlight}
+        - **Key Area for Improvement:** {key_improvement_area}
 
         ---
 
         ## Detailed Feedback
 
         ### Fluency and Coherence:
-        - **Strength:** {details.fluency_and_coherence.strength}
-        - **Area for Improvement:** {details.fluency_and_coherence.improvement_area}
+        - **Strength:** {fc_strength}
+        - **Area for Improvement:** {fc_improvement}
 
         ### Lexical Resource (Vocabulary):
-        - **Strength:** {details.lexical_resource.strength}
-        - **Area for Improvement:** {details.lexical_resource.improvement_area}
+        - **Strength:** {lr_strength}
+        - **Area for Improvement:** {lr_improvement}
 
         ### Grammatical Range and Accuracy:
-        - **Strength:** {details.grammatical_range_and_accuracy.strength}
-        - **Area for Improvement:** {details.grammatical_range_and_accuracy.improvement_area}
+        - **Strength:** {gra_strength}
+        - **Area for Improvement:** {gra_improvement}
 
         ### Pronunciation (Inferred):
-        - **Strength:** {details.pronunciation_inferred.strength}
-        - **Area for Improvement:** {details.pronunciation_inferred.improvement_area}
+        - **Strength:** {pron_strength}
+        - **Area for Improvement:** {pron_improvement}
         """
-    return display_text
+
+# The disclaimer is constant, so it is baked into the template.
+_FINAL_REPORT_TEMPLATE = """
+    > **Disclaimer:** This is an AI-generated estimate for practice purposes only. It is not an official IELTS score.
+
+    # Final Comprehensive Report
+
+    ## Overall Estimated Band Score: {overall_band_score}
+
+    ### Holistic Summary
+    - **Key Strengths:** {strengths}
+    - **Areas to Improve:** {areas_to_improve}
+
+    ---
+
+    ## Detailed Score Breakdown
+
+    ### Fluency and Coherence
+    - **Score:** {fc_score}
+    - **Justification:** {fc_justification}
+    - **Suggestion:** {fc_suggestion}
+
+    ### Lexical Resource (Vocabulary)
+    - **Score:** {lr_score}
+    - **Justification:** {lr_justification}
+    - **Suggestion:** {lr_suggestion}
+
+    ### Grammatical Range and Accuracy
+    - **Score:** {gra_score}
+    - **Justification:** {gra_justification}
+    - **Suggestion:** {gra_suggestion}
+
+    ### Pronunciation
+    - **Score:** {pron_score}
+    - **Justification:** {pron_justification}
+    - **Suggestion:** {pron_suggestion}
+    """
+
+# --- Per-Report Caches ---
+# id(report) -> (weakref to report, value). Keying by id skips hashing every field;
+# the weakref both guards against id reuse and evicts the entry when the report is
+# garbage collected. IELTSFeedback is frozen, so a cached value cannot go stale.
+_FLAT_CACHE: dict = {}
+_FORMAT_CACHE: dict = {}
+
+def _memoize_per_report(cache: dict, report, build):
+    """Returns cache's value for this exact report object, building it on first use."""
+    key = id(report)
+    cached = cache.get(key)
+    if cached is not None and cached[0]() is report:
+        return cached[1]
+    value = build(report)
+    cache[key] = (weakref.ref(report, lambda _, key=key: cache.pop(key, None)), value)
+    return value
+
+def _build_flat(report: IELTSFeedback) -> dict:
+    summary = report.overall_summary
+    details = report.detailed_feedback
+    fc = details.fluency_and_coherence
+    lr = details.lexical_resource
+    gra = details.grammatical_range_and_accuracy
+    pron = details.pronunciation_inferred
+    return {
+        "part_assessed": summary.part_assessed,
+        "positive_highlight": summary.positive_highlight,
+        "key_improvement_area": summary.key_improvement_area,
+        "fc_strength": fc.strength,
+        "fc_improvement": fc.improvement_area,
+        "lr_strength": lr.strength,
+        "lr_improvement": lr.improvement_area,
+        "gra_strength": gra.strength,
+        "gra_improvement": gra.improvement_area,
+        "pron_strength": pron.strength,
+        "pron_improvement": pron.improvement_area,
+    }
+
+def _flatten(report: IELTSFeedback) -> dict:
+    """Returns every display field of an IELTSFeedback as one flat dict, built once per report."""
+    return _memoize_per_report(_FLAT_CACHE, report, _build_flat)
+
+def format_feedback_for_display(report: IELTSFeedback) -> str:
+    """
+    Converts an IELTSFeedback object into a readable Markdown string.
+    Rendered once per report: the UI and the final-report prompt reuse the same text.
+    """
+    return _memoize_per_report(
+        _FORMAT_CACHE, report, lambda r: _FEEDBACK_TEMPLATE.format_map(_flatten(r))
+    )
 
 def format_transcript_text(answers_dict):
     """
@@ -64,9 +147,10 @@ def format_prior_feedback_summary(feedback_dict):
         part_key = f"part{part_num}"
         if report := feedback_dict.get(part_key):
             # We only extract the most critical summary points to keep the input clean.
+            flat = _flatten(report)
             summary_header = f"Prior Feedback Summary for Part {part_num}:"
-            positive_highlight = f"- Positive Highlight: {report.overall_summary.positive_highlight}"
-            key_improvement_area = f"- Key Improvement Area: {report.overall_summary.key_improvement_area}"
+            positive_highlight = f"- Positive Highlight: {flat['positive_highlight']}"
+            key_improvement_area = f"- Key Improvement Area: {flat['key_improvement_area']}"
             
             prior_feedback_summary.append(f"{summary_header}\n{positive_highlight}\n{key_improvement_area}")
         else:
@@ -106,46 +190,26 @@ def format_prior_feedback(feedback_dict: dict) -> str:
 
 def format_final_report_for_display(report: IELTSFinalReport) -> str:
     """Converts the final comprehensive report object into a readable Markdown string."""
-    
-    # --- The Disclaimer ---
-    disclaimer = "> **Disclaimer:** This is an AI-generated estimate for practice purposes only. It is not an official IELTS score."
-
     summary = report.holistic_summary
     scores = report.estimated_scores
-    
-    display_text = f"""
-    {disclaimer}
-
-    # Final Comprehensive Report
-
-    ## Overall Estimated Band Score: {report.overall_band_score}
-
-    ### Holistic Summary
-    - **Key Strengths:** {summary.strengths}
-    - **Areas to Improve:** {summary.areas_to_improve}
-
-    ---
-
-    ## Detailed Score Breakdown
-
-    ### Fluency and Coherence
-    - **Score:** {scores.fluency_and_coherence.score}
-    - **Justification:** {scores.fluency_and_coherence.justification}
-    - **Suggestion:** {scores.fluency_and_coherence.suggestion}
-
-    ### Lexical Resource (Vocabulary)
-    - **Score:** {scores.lexical_resource.score}
-    - **Justification:** {scores.lexical_resource.justification}
-    - **Suggestion:** {scores.lexical_resource.suggestion}
-
-    ### Grammatical Range and Accuracy
-    - **Score:** {scores.grammatical_range_and_accuracy.score}
-    - **Justification:** {scores.grammatical_range_and_accuracy.justification}
-    - **Suggestion:** {scores.grammatical_range_and_accuracy.suggestion}
-
-    ### Pronunciation
-    - **Score:** {scores.pronunciation.score}
-    - **Justification:** {scores.pronunciation.justification}
-    - **Suggestion:** {scores.pronunciation.suggestion}
-    """
-    return display_text
\ No newline at end of file
+    fc = scores.fluency_and_coherence
+    lr = scores.lexical_resource
+    gra = scores.grammatical_range_and_accuracy
+    pron = scores.pronunciation
+    return _FINAL_REPORT_TEMPLATE.format_map({
+        "overall_band_score": report.overall_band_score,
+        "strengths": summary.strengths,
+        "areas_to_improve": summary.areas_to_improve,
+        "fc_score": fc.score,
+        "fc_justification": fc.justification,
+        "fc_suggestion": fc.suggestion,
+        "lr_score": lr.score,
+        "lr_justification": lr.justification,
+        "lr_suggestion": lr.suggestion,
+        "gra_score": gra.score,
+        "gra_justification": gra.justification,
+        "gra_suggestion": gra.suggestion,
+        "pron_score": pron.score,
+        "pron_justification": pron.justification,
+        "pron_suggestion": pron.suggestion,
+    })
@@ -1,10 +1,16 @@
+import re
+
+# Deletes Markdown characters in a single C-level pass
+_MD_STRIP = str.maketrans("", "", "*#_`~")
+# Splits after sentence-ending punctuation, consuming the whitespace between sentences
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
 def clean_text_for_speech(text):
     """Removes Markdown characters from text for cleaner TTS output."""
+    return text.translate(_MD_STRIP) if text else ""
+
+def clean_and_split_for_speech(text):
+    """Removes Markdown characters and splits the text into sentences for streaming TTS."""
     if not text:
-        return ""
-    text = text.replace('*', '')
-    text = text.replace('#', '')
-    text = text.replace('_', '')
-    text = text.replace('`', '')
-    text = text.replace('~', '')
-    return text
\ No newline at end of file
+        return []
+    return _SENT_SPLIT.split(text.translate(_MD_STRIP))